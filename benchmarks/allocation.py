@@ -0,0 +1,84 @@
+"""Measure the cost of simulating the surplus allocation.
+
+The simulation runs on the event loop once per coordinator update while the
+simulated leftover sensor is enabled, and on every simulate_allocation
+service call, so it has to stay cheap with many devices. Run from the
+repository root in an environment with Home Assistant installed:
+
+    python -m benchmarks.allocation --devices 10 100 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import time
+import timeit
+
+from custom_components.opensurplusmanager.allocation import simulate_allocation
+from custom_components.opensurplusmanager.core import OSMCore
+from custom_components.opensurplusmanager.device import OSMDevice
+from custom_components.opensurplusmanager.state_store import DeviceStateStore
+
+
+def make_devices(
+    count: int,
+) -> tuple[OSMCore, list[OSMDevice], dict[str, tuple[bool, float]]]:
+    """Return a core, count random devices and when each switched."""
+    rng = random.Random(0)
+    core = OSMCore(None, "benchmark")
+    core.surplus = 200.0 * count
+    core.grid_margin = 100.0
+    core.surplus_margin = 50.0
+    core.idle_power = 5.0
+    store = DeviceStateStore()
+    devices = []
+    switches = {}
+    now = time.monotonic()
+    for i in range(count):
+        device = OSMDevice(None, f"device{i}", store, "benchmark")
+        expected = rng.uniform(100, 2000)
+        device.powered = rng.random() < 0.5
+        device.consumption = expected if device.powered else 0.0
+        device.enabled = rng.random() < 0.9
+        device.max_consumption = expected * 1.2
+        device.expected_consumption = expected
+        device.cooldown = rng.choice((0, 60, 300))
+        switches[device.device_name] = (
+            bool(device.powered),
+            now - rng.uniform(0, 600) if rng.random() < 0.5 else -math.inf,
+        )
+        devices.append(device)
+    return core, devices, switches
+
+
+def main() -> None:
+    """Run the benchmark and print one row per device count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--number", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'devices':>8} {'simulate us':>12} {'us/device':>10} {'powered':>8}")
+    for count in args.devices:
+        core, devices, switches = make_devices(count)
+        now = time.monotonic()
+        result = simulate_allocation(core, devices, switches, now)
+        assert result is not None
+        best = min(
+            timeit.repeat(
+                lambda: simulate_allocation(core, devices, switches, now),  # noqa: B023
+                number=args.number,
+                repeat=5,
+            )
+        )
+        per_call = best / args.number * 1e6
+        print(
+            f"{count:>8} {per_call:>12.1f} {per_call / count:>10.2f}"
+            f" {len(result['powered']):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compare the cost of decoding a bulk device payload into the device state.
+
+The legacy path is the one refreshes used before the typed decode: the
+standard library JSON decoder aiohttp uses by default, a pyosmanager
+DeviceResponse per device, and every field copied onto the device one by
+one. The current path decodes with orjson and writes each payload straight
+into the state store. Run from the repository root in an environment with
+Home Assistant installed:
+
+    python -m benchmarks.decode --devices 100 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import random
+import time
+import timeit
+import tracemalloc
+from typing import Any, cast
+
+from pyosmanager.responses import DeviceResponse
+
+from custom_components.opensurplusmanager.client import DevicePayload
+from custom_components.opensurplusmanager.device import OSMDevice
+from custom_components.opensurplusmanager.state_store import DeviceStateStore
+from homeassistant.util.json import json_loads
+
+
+def make_body(count: int) -> bytes:
+    """Return the JSON body of a bulk device response with count devices."""
+    rng = random.Random(0)
+    devices = []
+    for i in range(count):
+        expected = round(rng.uniform(100, 2000), 1)
+        powered = rng.random() < 0.5
+        devices.append(
+            {
+                "name": f"device{i}",
+                "device_type": "switch",
+                "control_integration": "fake",
+                "expected_consumption": expected,
+                "max_consumption": expected * 1.2,
+                "consumption": expected if powered else 0.0,
+                "powered": powered,
+                "cooldown": 60,
+                "enabled": True,
+            }
+        )
+    return json.dumps(devices).encode()
+
+
+def make_devices(count: int) -> list[OSMDevice]:
+    """Return count devices sharing a single state store."""
+    store = DeviceStateStore()
+    return [OSMDevice(None, f"device{i}", store, "benchmark") for i in range(count)]
+
+
+def legacy_update(devices: list[OSMDevice], body: bytes) -> None:
+    """Decode through response objects and copy every field by hand."""
+    states = [DeviceResponse(**device) for device in json.loads(body)]
+    for device, state in zip(devices, states, strict=True):
+        device.consumption = state.consumption
+        device.powered = state.powered
+        device.enabled = state.enabled
+        device.max_consumption = state.max_consumption
+        device.expected_consumption = state.expected_consumption
+        device.cooldown = state.cooldown
+        device.last_updated = time.monotonic()
+        device.initialized = True
+
+
+def typed_update(devices: list[OSMDevice], body: bytes) -> None:
+    """Decode with orjson and write the payloads straight into the store."""
+    payloads = cast(list[DevicePayload], json_loads(body))
+    for device, payload in zip(devices, payloads, strict=True):
+        device.update_from_payload(payload)
+
+
+def peak_allocated(update: Any, devices: list[OSMDevice], body: bytes) -> int:
+    """Return the peak bytes allocated by a single update."""
+    tracemalloc.start()
+    update(devices, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    """Run the benchmark and print one row per device count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--number", type=int, default=100)
+    args = parser.parse_args()
+
+    print(
+        f"{'devices':>8} {'legacy us':>10} {'typed us':>10} {'speedup':>8}"
+        f" {'legacy KiB':>11} {'typed KiB':>10}"
+    )
+    for count in args.devices:
+        body = make_body(count)
+        devices = make_devices(count)
+        results = {}
+        for name, update in (("legacy", legacy_update), ("typed", typed_update)):
+            best = min(
+                timeit.repeat(
+                    functools.partial(update, devices, body),
+                    number=args.number,
+                    repeat=5,
+                )
+            )
+            results[name] = (
+                best / args.number * 1e6,
+                peak_allocated(update, devices, body) / 1024,
+            )
+        legacy, typed = results["legacy"], results["typed"]
+        print(
+            f"{count:>8} {legacy[0]:>10.1f} {typed[0]:>10.1f}"
+            f" {legacy[0] / typed[0]:>7.1f}x {legacy[1]:>11.1f} {typed[1]:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
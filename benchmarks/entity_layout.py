@@ -0,0 +1,120 @@
+"""Compare the memory use and field access speed of the device state layouts.
+
+The legacy layout is the one devices used before the state store: every
+field a separate instance attribute. Run from the repository root in an
+environment with Home Assistant installed:
+
+    python -m benchmarks.entity_layout --devices 100 500 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import timeit
+import tracemalloc
+
+from custom_components.opensurplusmanager.device import OSMDevice
+from custom_components.opensurplusmanager.state_store import DeviceStateStore
+
+
+class LegacyDevice:
+    """Device state held as one instance attribute per field."""
+
+    def __init__(self, device_name: str, value: float) -> None:
+        """Initialize the device."""
+        self.client = None
+        self.device_name = device_name
+        self._optimistic: dict = {}
+        self._confirmed: dict = {}
+        self.consumption = value
+        self.powered = True
+        self.enabled = True
+        self.max_consumption = value + 1
+        self.expected_consumption = value + 2
+        self.cooldown = 1000 + int(value)
+        self.last_updated = value + 3
+        self._initialized = asyncio.Event()
+
+    @property
+    def device_info(self) -> dict:
+        """Build the device info on every access, as the entities used to."""
+        return {
+            "identifiers": {("opensurplusmanager", self.device_name)},
+            "name": self.device_name,
+        }
+
+
+def build_legacy(count: int) -> list[LegacyDevice]:
+    """Return count legacy devices."""
+    return [LegacyDevice(f"device{i}", i * 1.5) for i in range(count)]
+
+
+def build_compact(count: int) -> list[OSMDevice]:
+    """Return count devices sharing a single state store."""
+    store = DeviceStateStore()
+    devices = []
+    for i in range(count):
+        value = i * 1.5
+        device = OSMDevice(None, f"device{i}", store, "benchmark")
+        device.consumption = value
+        device.powered = True
+        device.enabled = True
+        device.max_consumption = value + 1
+        device.expected_consumption = value + 2
+        device.cooldown = 1000 + int(value)
+        device.last_updated = value + 3
+        devices.append(device)
+    return devices
+
+
+def measure_memory(build, count: int) -> int:
+    """Return the bytes allocated while building count devices."""
+    gc.collect()
+    tracemalloc.start()
+    devices = build(count)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del devices
+    return size
+
+
+def measure_access(devices, number: int) -> float:
+    """Return the seconds per pass reading every field of every device."""
+
+    def read_all() -> None:
+        for device in devices:
+            _ = (
+                device.consumption,
+                device.powered,
+                device.enabled,
+                device.max_consumption,
+                device.expected_consumption,
+                device.cooldown,
+                device.device_info,
+            )
+
+    return min(timeit.repeat(read_all, number=number, repeat=5)) / number
+
+
+def main() -> None:
+    """Run the benchmark and print one row per layout and device count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--number", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'layout':<8} {'devices':>8} {'bytes/device':>13} {'ns/field':>9}")
+    for count in args.devices:
+        for name, build in (("legacy", build_legacy), ("compact", build_compact)):
+            memory = measure_memory(build, count)
+            access = measure_access(build(count), args.number)
+            print(
+                f"{name:<8} {count:>8} {memory / count:>13.0f}"
+                f" {access / count / 7 * 1e9:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Fake Open Surplus Manager server for benchmarks and local development.
+
+Serves the endpoints pyosmanager.OSMClient uses, plus the /api/events
+server-sent events stream, for any number of simulated devices. Every
+request can be delayed by a fixed latency plus random jitter and can fail
+with a 500 at a configurable rate. With ETags enabled, state responses
+carry one and conditional requests for unchanged state get a 304. Run it
+standalone with:
+
+    python -m benchmarks.fake_server --devices 100 --latency 0.02 --port 8080
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import hashlib
+import json
+import random
+from typing import Any
+
+from aiohttp import web
+
+DEVICE_SETTINGS = ("max_consumption", "expected_consumption", "cooldown")
+CORE_SETTINGS = ("surplus_margin", "grid_margin", "idle_power")
+
+
+@dataclass
+class FakeOSMConfig:
+    """How the fake server behaves."""
+
+    devices: int = 10
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    event_interval: float = 1.0
+    etags: bool = False
+    seed: int | None = None
+
+
+@dataclass
+class FakeOSMState:
+    """Simulated core and device state."""
+
+    core: dict[str, float]
+    devices: dict[str, dict[str, Any]]
+    random: random.Random = field(repr=False)
+
+    @classmethod
+    def create(cls, config: FakeOSMConfig) -> FakeOSMState:
+        """Return a state with config.devices devices."""
+        rng = random.Random(config.seed)
+        devices = {}
+        for i in range(config.devices):
+            name = f"device_{i:04d}"
+            max_consumption = rng.choice((500.0, 1000.0, 2000.0, 3500.0))
+            devices[name] = {
+                "name": name,
+                "device_type": "switch",
+                "control_integration": "fake",
+                "expected_consumption": max_consumption * 0.8,
+                "max_consumption": max_consumption,
+                "consumption": 0.0,
+                "powered": False,
+                "cooldown": 60,
+                "enabled": True,
+            }
+        core = {
+            "surplus": 1000.0,
+            "surplus_margin": 100.0,
+            "grid_margin": 50.0,
+            "idle_power": 20.0,
+        }
+        return cls(core, devices, rng)
+
+    def step(self) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        """Advance the simulation and return the core and device deltas."""
+        rng = self.random
+        self.core["surplus"] = round(self.core["surplus"] + rng.gauss(0, 150), 1)
+        changed = []
+        for device in rng.sample(
+            list(self.devices.values()), k=min(len(self.devices), 5)
+        ):
+            if rng.random() < 0.2:
+                device["powered"] = not device["powered"]
+            device["consumption"] = (
+                round(device["expected_consumption"] * rng.uniform(0.7, 1.1), 1)
+                if device["powered"]
+                else 0.0
+            )
+            changed.append(
+                {
+                    "name": device["name"],
+                    "powered": device["powered"],
+                    "consumption": device["consumption"],
+                }
+            )
+        return {"surplus": self.core["surplus"]}, changed
+
+
+class FakeOSMServer:
+    """aiohttp application simulating an Open Surplus Manager server."""
+
+    def __init__(self, config: FakeOSMConfig) -> None:
+        """Initialize the server."""
+        self.config = config
+        self.state = FakeOSMState.create(config)
+        self.requests: Counter[str] = Counter()
+        self._random = random.Random(config.seed)
+        self._runner: web.AppRunner | None = None
+        self._streams: set[asyncio.Task[Any]] = set()
+        self.port: int | None = None
+
+    @property
+    def url(self) -> str:
+        """Return the base URL clients should use."""
+        return f"http://127.0.0.1:{self.port}"
+
+    def application(self) -> web.Application:
+        """Return the aiohttp application."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/api/", self._health)
+        app.router.add_get("/api/core", self._core)
+        app.router.add_get("/api/surplus", self._surplus)
+        app.router.add_get("/api/devices", self._devices)
+        app.router.add_get("/api/events", self._events)
+        app.router.add_get("/api/device/{name}", self._device)
+        app.router.add_get("/api/device/{name}/consumption", self._consumption)
+        for setting in CORE_SETTINGS:
+            app.router.add_post(f"/api/{setting}", self._set_core)
+        app.router.add_post("/api/device/{name}/{setting}", self._set_device)
+        return app
+
+    async def start(self, port: int = 0) -> None:
+        """Start listening on port, or on a free port if it is 0."""
+        self._runner = web.AppRunner(self.application(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop the server, ending the open event streams first."""
+        # Shutdown would otherwise wait for them until its timeout.
+        for stream in self._streams:
+            stream.cancel()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        """Count the request, then delay or fail it as configured."""
+        route = request.match_info.route.resource
+        self.requests[route.canonical if route is not None else request.path] += 1
+        if request.path == "/api/events":
+            return await handler(request)
+
+        delay = self.config.latency + self._random.uniform(0, self.config.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.config.error_rate:
+            raise web.HTTPInternalServerError
+        return await handler(request)
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    def _state_response(self, request: web.Request, state: Any) -> web.Response:
+        """Return state as JSON, or a 304 if the client already has it."""
+        if not self.config.etags:
+            return web.json_response(state)
+        body = json.dumps(state)
+        etag = f'"{hashlib.blake2b(body.encode(), digest_size=8).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            text=body, content_type="application/json", headers={"ETag": etag}
+        )
+
+    async def _core(self, request: web.Request) -> web.Response:
+        self.state.step()
+        return self._state_response(request, self.state.core)
+
+    async def _surplus(self, request: web.Request) -> web.Response:
+        return web.json_response({"surplus": self.state.core["surplus"]})
+
+    async def _devices(self, request: web.Request) -> web.Response:
+        return self._state_response(request, list(self.state.devices.values()))
+
+    def _get_device(self, request: web.Request) -> dict[str, Any]:
+        if (device := self.state.devices.get(request.match_info["name"])) is None:
+            raise web.HTTPNotFound
+        return device
+
+    async def _device(self, request: web.Request) -> web.Response:
+        return self._state_response(request, self._get_device(request))
+
+    async def _consumption(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"consumption": self._get_device(request)["consumption"]}
+        )
+
+    async def _set_core(self, request: web.Request) -> web.Response:
+        setting = request.path.rsplit("/", 1)[1]
+        body = await request.json()
+        self.state.core[setting] = body[setting]
+        return web.json_response({setting: body[setting]})
+
+    async def _set_device(self, request: web.Request) -> web.Response:
+        device = self._get_device(request)
+        setting = request.match_info["setting"]
+        if setting not in DEVICE_SETTINGS:
+            raise web.HTTPNotFound
+        body = await request.json()
+        device[setting] = body[setting]
+        return web.json_response({setting: body[setting]})
+
+    async def _events(self, request: web.Request) -> web.StreamResponse:
+        """Stream a core event and the changed devices every event interval."""
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        stream = asyncio.current_task()
+        assert stream is not None
+        self._streams.add(stream)
+        try:
+            while True:
+                await asyncio.sleep(self.config.event_interval)
+                core, devices = self.state.step()
+                chunks = [f"event: core\ndata: {json.dumps(core)}\n\n"]
+                chunks.extend(
+                    f"event: device\ndata: {json.dumps(device)}\n\n"
+                    for device in devices
+                )
+                await response.write("".join(chunks).encode())
+        except ConnectionResetError:
+            # The client went away.
+            pass
+        finally:
+            self._streams.discard(stream)
+        return response
+
+
+def main() -> None:
+    """Run the fake server until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--event-interval", type=float, default=1.0)
+    parser.add_argument("--etags", action="store_true")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    server = FakeOSMServer(
+        FakeOSMConfig(
+            devices=args.devices,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            event_interval=args.event_interval,
+            etags=args.etags,
+            seed=args.seed,
+        )
+    )
+    web.run_app(server.application(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Measure the cost of fitting the surplus forecast.
+
+The fit runs in the executor so it never blocks the event loop; this shows
+how long the fit itself takes at increasing history sizes, next to the
+executor round trip that hides it and the time the loop spends taking the
+history snapshot. Run from the repository root in an environment with
+Home Assistant installed:
+
+    python -m benchmarks.forecast --samples 60 300 1024
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import random
+import timeit
+
+import numpy as np
+
+from custom_components.opensurplusmanager.const import FORECAST_HORIZONS
+from custom_components.opensurplusmanager.forecast import SampleHistory, fit_trend
+
+
+def random_walk(samples: int) -> SampleHistory:
+    """Return a history of samples readings one second apart."""
+    rng = random.Random(0)
+    history = SampleHistory(samples)
+    value = 1000.0
+    for i in range(samples):
+        value += rng.gauss(0, 50)
+        history.append(float(i), value)
+    return history
+
+
+async def executor_round_trip(history: SampleHistory, number: int) -> float:
+    """Return the seconds per fit awaited through an executor, as the loop sees it."""
+    loop = asyncio.get_running_loop()
+    horizons = np.array(FORECAST_HORIZONS, dtype=float)
+    now = history.last_time
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        started = loop.time()
+        for _ in range(number):
+            await loop.run_in_executor(
+                executor, fit_trend, *history.snapshot(), now, horizons
+            )
+        return (loop.time() - started) / number
+
+
+def main() -> None:
+    """Run the benchmark and print one row per history size."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, nargs="+", default=[60, 300, 1024])
+    parser.add_argument("--number", type=int, default=1000)
+    args = parser.parse_args()
+
+    horizons = np.array(FORECAST_HORIZONS, dtype=float)
+    print(f"{'samples':>8} {'snapshot us':>12} {'fit us':>8} {'round trip us':>14}")
+    for samples in args.samples:
+        history = random_walk(samples)
+        time_array, value_array = history.snapshot()
+        now = history.last_time
+
+        snapshot = min(timeit.repeat(history.snapshot, number=args.number, repeat=5))
+        fit = min(
+            timeit.repeat(
+                lambda: fit_trend(time_array, value_array, now, horizons),  # noqa: B023
+                number=args.number,
+                repeat=5,
+            )
+        )
+        round_trip = asyncio.run(executor_round_trip(history, args.number))
+        print(
+            f"{samples:>8} {snapshot / args.number * 1e6:>12.1f}"
+            f" {fit / args.number * 1e6:>8.1f} {round_trip * 1e6:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Check the push listener against the event stream of the fake server.
+
+The integration is set up with push updates in a test Home Assistant
+instance, going through the real __init__, coordinator and push listener
+over HTTP. Requires the pytest-homeassistant-custom-component package. Run
+from the repository root:
+
+    python -m benchmarks.push --devices 10
+
+Each step fails with an AssertionError or a TimeoutError, and prints how
+long it took when it passes:
+
+- connect: the listener subscribes and polling slows to the safety poll
+- deltas: pushed core and device events keep the state in sync with the
+  server without any polling request
+- fallback: when the server goes away, regular polling resumes
+- reconnect: once the server is back, the listener subscribes again
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+import tempfile
+import time
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.opensurplusmanager.const import (
+    CONF_PUSH_UPDATES,
+    DOMAIN,
+    PUSH_FALLBACK_INTERVAL,
+)
+from custom_components.opensurplusmanager.coordinator import OSMCoordinator
+from homeassistant import loader
+
+from .fake_server import FakeOSMConfig, FakeOSMServer
+from .scaling import set_up
+
+
+async def wait_for(condition: Callable[[], bool], timeout: float) -> float:
+    """Return how many seconds it took until condition held."""
+    started = time.perf_counter()
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+    return time.perf_counter() - started
+
+
+def in_sync(coordinator: OSMCoordinator, server: FakeOSMServer) -> bool:
+    """Return whether the coordinator holds the state the server streamed."""
+    if coordinator.core.surplus != server.state.core["surplus"]:
+        return False
+    for device in coordinator.devices:
+        state = server.state.devices[device.device_name]
+        if (device.powered, device.consumption) != (
+            state["powered"],
+            state["consumption"],
+        ):
+            return False
+    return True
+
+
+def polls(server: FakeOSMServer) -> int:
+    """Return how many requests other than the event stream the server got."""
+    return sum(
+        count for route, count in server.requests.items() if route != "/api/events"
+    )
+
+
+async def run(args: argparse.Namespace) -> dict[str, float]:
+    """Run every step and return how long each took."""
+    server = FakeOSMServer(
+        FakeOSMConfig(
+            devices=args.devices, event_interval=args.event_interval, seed=args.seed
+        )
+    )
+    await server.start()
+    port = server.port
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            async with async_test_home_assistant(config_dir=config_dir) as hass:
+                hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+                entry = MockConfigEntry(
+                    domain=DOMAIN,
+                    data={"host": server.url},
+                    options={CONF_PUSH_UPDATES: True},
+                )
+                entry.add_to_hass(hass)
+                await set_up(hass, entry)
+                coordinator = entry.runtime_data
+                push = coordinator.push
+                assert push is not None, "The push listener did not start"
+
+                results["connect"] = await wait_for(
+                    lambda: push.connected, args.timeout
+                )
+                assert (
+                    coordinator.refresh_interval
+                    == PUSH_FALLBACK_INTERVAL.total_seconds()
+                )
+                # Let the catch-up refresh requested on connect land.
+                await hass.async_block_till_done()
+
+                server.requests.clear()
+                revision = coordinator.data
+                results["deltas"] = await wait_for(
+                    lambda: (
+                        coordinator.data >= revision + args.events
+                        and in_sync(coordinator, server)
+                    ),
+                    args.timeout,
+                )
+                assert polls(server) == 0, "Deltas were polled instead of pushed"
+
+                await server.stop()
+                results["fallback"] = await wait_for(
+                    lambda: not push.connected, args.timeout
+                )
+                assert coordinator.refresh_interval == coordinator.scheduler.interval
+
+                await server.start(port)
+                results["reconnect"] = await wait_for(
+                    lambda: push.connected, args.timeout
+                )
+                assert (
+                    coordinator.refresh_interval
+                    == PUSH_FALLBACK_INTERVAL.total_seconds()
+                )
+
+                assert await hass.config_entries.async_unload(entry.entry_id)
+                await hass.async_block_till_done()
+    finally:
+        await server.stop()
+    return results
+
+
+def main() -> None:
+    """Run the check and print the time of every step."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=10)
+    parser.add_argument("--event-interval", type=float, default=0.05)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for step, seconds in asyncio.run(run(args)).items():
+        print(f"{step:>10}: {seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
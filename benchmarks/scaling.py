@@ -0,0 +1,220 @@
+"""Measure setup and refresh cost of the integration at increasing device counts.
+
+For each device count a fake server is started and the integration is set
+up in a test Home Assistant instance, going through the real __init__,
+coordinator and platform code over HTTP. Requires the
+pytest-homeassistant-custom-component package. Run from the repository
+root:
+
+    python -m benchmarks.scaling --devices 10 100 1000 --output results.json
+
+Recorded per device count:
+
+- cold and warm setup time, without and with the persisted cache
+- HTTP requests per refresh cycle
+- refresh latency percentiles
+- event loop blocking, as the lag of a timer that should fire every
+  millisecond, during setup and during refreshes
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+import json
+import platform
+import statistics
+import tempfile
+import time
+from typing import Any
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.opensurplusmanager.const import DOMAIN
+from homeassistant import loader
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant
+
+from .fake_server import FakeOSMConfig, FakeOSMServer
+
+LAG_INTERVAL = 0.001
+
+
+class LoopLagMonitor:
+    """Measure how late a periodic timer fires, which is time the loop was blocked."""
+
+    def __init__(self) -> None:
+        """Initialize the monitor."""
+        self.lags: list[float] = []
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(max(loop.time() - expected, 0.0))
+
+    def __enter__(self) -> LoopLagMonitor:
+        """Start measuring."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Stop measuring."""
+        assert self._task is not None
+        self._task.cancel()
+
+    def summary(self) -> dict[str, float]:
+        """Return the total and worst lag in milliseconds."""
+        return {
+            "total_ms": sum(self.lags) * 1000,
+            "max_ms": max(self.lags, default=0.0) * 1000,
+        }
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """Return latency percentiles in milliseconds."""
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": cuts[49] * 1000,
+        "p90_ms": cuts[89] * 1000,
+        "p99_ms": cuts[98] * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+async def timed(action: Callable[[], Awaitable[Any]]) -> float:
+    """Return how many seconds action took."""
+    started = time.perf_counter()
+    await action()
+    return time.perf_counter() - started
+
+
+async def set_up(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    """Set up the entry and wait until everything settled."""
+    assert await hass.config_entries.async_setup(entry.entry_id), (
+        f"Setup failed with the entry in state {entry.state}"
+    )
+    await hass.async_block_till_done()
+
+
+async def run_case(args: argparse.Namespace, devices: int) -> dict[str, Any]:
+    """Benchmark a single device count."""
+    server = FakeOSMServer(
+        FakeOSMConfig(
+            devices=devices,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            etags=args.etags,
+            seed=args.seed,
+        )
+    )
+    await server.start()
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            async with async_test_home_assistant(config_dir=config_dir) as hass:
+                hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+                entry = MockConfigEntry(domain=DOMAIN, data={"host": server.url})
+                entry.add_to_hass(hass)
+
+                with LoopLagMonitor() as setup_lag:
+                    cold_setup = await timed(lambda: set_up(hass, entry))
+                setup_requests = sum(server.requests.values())
+
+                assert await hass.config_entries.async_unload(entry.entry_id)
+                await hass.async_block_till_done()
+                warm_setup = await timed(lambda: set_up(hass, entry))
+                coordinator = entry.runtime_data
+                # Let the first refresh started by setup land before counting.
+                await hass.async_block_till_done(wait_background_tasks=True)
+
+                server.requests.clear()
+                await coordinator.async_refresh()
+                requests_per_cycle = sum(server.requests.values())
+
+                latencies = []
+                with LoopLagMonitor() as refresh_lag:
+                    for _ in range(args.cycles):
+                        latencies.append(await timed(coordinator.async_refresh))
+
+                entities = len(hass.states.async_all())
+                conditional = coordinator.client.conditional_stats.as_dict()
+                assert await hass.config_entries.async_unload(entry.entry_id)
+                await hass.async_block_till_done()
+    finally:
+        await server.stop()
+
+    return {
+        "devices": devices,
+        "entities": entities,
+        "cold_setup_s": cold_setup,
+        "warm_setup_s": warm_setup,
+        "setup_requests": setup_requests,
+        "requests_per_cycle": requests_per_cycle,
+        "refresh_latency": percentiles(latencies),
+        "conditional_requests": conditional,
+        "loop_lag_setup": setup_lag.summary(),
+        "loop_lag_refresh": refresh_lag.summary(),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run every device count and return the report."""
+    results = []
+    for devices in args.devices:
+        result = await run_case(args, devices)
+        print(
+            f"{devices:>6} devices: cold setup {result['cold_setup_s']:.3f} s,"
+            f" warm setup {result['warm_setup_s']:.3f} s,"
+            f" {result['requests_per_cycle']} requests/cycle,"
+            f" refresh p50 {result['refresh_latency']['p50_ms']:.1f} ms"
+        )
+        results.append(result)
+
+    return {
+        "benchmark": "scaling",
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "homeassistant": HA_VERSION,
+        "parameters": {
+            "cycles": args.cycles,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "etags": args.etags,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Run the benchmark and write the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--etags", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark-results.json")
+    args = parser.parse_args()
+    if args.cycles < 2:
+        parser.error("--cycles must be at least 2 to compute percentiles")
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
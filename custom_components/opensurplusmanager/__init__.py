@@ -2,40 +2,194 @@
 
 from __future__ import annotations
 
-import asyncio
+import logging
+import time
+
+from pyosmanager import APIError
 
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from pyosmanager import OSMClient
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import (
+    config_validation as cv,
+    device_registry as dr,
+    entity_registry as er,
+)
+from homeassistant.helpers.typing import ConfigType
 
+from .cache import OSMStateCache
+from .client import create_pooled_client
+from .const import (
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_PUSH_UPDATES,
+    CONF_STALE_TTL,
+    CONF_STARTUP_TIMEOUT,
+    DATA_STAGGER,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_STALE_TTL,
+    DEFAULT_STARTUP_TIMEOUT,
+    DOMAIN,
+    KEEPALIVE_INTERVALS,
+    PUSH_FALLBACK_INTERVAL,
+)
 from .coordinator import OSMConfigEntry, OSMCoordinator
 from .core import OSMCore
-from .device import OSMDevice
+from .push import OSMPushListener
+from .scheduler import RefreshStagger
+from .services import async_setup_services
+
+_LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR, Platform.NUMBER]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Open Surplus Manager services and refresh stagger."""
+    hass.data[DATA_STAGGER] = RefreshStagger()
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: OSMConfigEntry) -> bool:
     """Set up Open Surplus Manager from a config entry."""
-    client = OSMClient(entry.data["host"])
+    started = time.monotonic()
+    slowest = entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL)
+    if entry.options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES):
+        slowest = max(slowest, PUSH_FALLBACK_INTERVAL.total_seconds())
+    client = create_pooled_client(entry.data["host"], KEEPALIVE_INTERVALS * slowest)
 
-    result = await client.is_healthy()
-    if not result:
-        return False
+    cache = OSMStateCache(hass, entry.entry_id)
+    cached = await cache.async_load()
 
-    devices = await client.get_devices()
-    devices = [OSMDevice(client, device.name) for device in devices]
-    core = OSMCore(client)
-    coordinator = OSMCoordinator(client, core, devices)
+    if cached is None:
+        # Without a cache there is nothing to build entities from, so let
+        # Home Assistant retry the setup until the server is reachable.
+        if not await client.is_healthy():
+            await client.close()
+            raise ConfigEntryNotReady(f"Cannot connect to {entry.data['host']}")
+        try:
+            names = [device.name for device in await client.get_devices()]
+        except APIError as err:
+            await client.close()
+            raise ConfigEntryNotReady(
+                f"Cannot fetch devices from {entry.data['host']}"
+            ) from err
+    else:
+        names = list(cached["devices"])
+
+    core = OSMCore(client, entry.data["host"])
+    coordinator = OSMCoordinator(hass, entry, client, core, names, cache=cache)
+    entry.async_on_unload(hass.data[DATA_STAGGER].register(entry.entry_id))
+    if cached is not None:
+        OSMStateCache.restore(
+            cached,
+            core,
+            coordinator.devices,
+            entry.options.get(CONF_STALE_TTL, DEFAULT_STALE_TTL),
+        )
+
+    # The first refresh keeps running in the background if the server is slow,
+    # entities then start from the cache, or unavailable without one, and
+    # fill in once it lands. Devices added since the cache was saved are
+    # picked up by that refresh.
+    coordinator.first_refresh = entry.async_create_background_task(
+        hass, coordinator.async_refresh(), "opensurplusmanager first refresh"
+    )
+    timeout = entry.options.get(CONF_STARTUP_TIMEOUT, DEFAULT_STARTUP_TIMEOUT)
+    if cached is None and not await coordinator.wait_for_initialization(timeout):
+        _LOGGER.warning(
+            "No initial state from %s after %s seconds, starting unavailable",
+            entry.data["host"],
+            timeout,
+        )
+    coordinator.cold_start_duration = time.monotonic() - started
+    _LOGGER.info("Cold start took %.2f seconds", coordinator.cold_start_duration)
 
     entry.runtime_data = coordinator
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if entry.options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES):
+        coordinator.push = OSMPushListener(coordinator)
+        entry.async_create_background_task(
+            hass, coordinator.push.async_run(), "opensurplusmanager push listener"
+        )
+
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
     return True
 
 
+async def async_migrate_entry(hass: HomeAssistant, entry: OSMConfigEntry) -> bool:
+    """Scope the unique IDs of an entry to its host."""
+    if entry.version > 1:
+        return False
+
+    if entry.minor_version < 2:
+        # Entries used to be global, so unique IDs and device identifiers
+        # carried no host and "core" identified the core device.
+        host = entry.data["host"]
+
+        @callback
+        def scope_entity(entity_entry: er.RegistryEntry) -> dict[str, str]:
+            return {"new_unique_id": f"{host}_{entity_entry.unique_id}"}
+
+        await er.async_migrate_entries(hass, entry.entry_id, scope_entity)
+
+        device_registry = dr.async_get(hass)
+        for device_entry in dr.async_entries_for_config_entry(
+            device_registry, entry.entry_id
+        ):
+            device_registry.async_update_device(
+                device_entry.id,
+                new_identifiers={
+                    (DOMAIN, host if identifier == "core" else f"{host}_{identifier}")
+                    if domain == DOMAIN
+                    else (domain, identifier)
+                    for domain, identifier in device_entry.identifiers
+                },
+            )
+
+        hass.config_entries.async_update_entry(entry, unique_id=host, minor_version=2)
+        _LOGGER.debug("Scoped the unique IDs of %s to its host", host)
+
+    return True
+
+
+async def async_remove_config_entry_device(
+    hass: HomeAssistant, entry: OSMConfigEntry, device_entry: dr.DeviceEntry
+) -> bool:
+    """Allow removing devices that are no longer managed by the server."""
+    coordinator = entry.runtime_data
+    managed = {coordinator.core.unique_id} | {
+        device.unique_id for device in coordinator.devices
+    }
+    return not any(
+        identifier[0] == DOMAIN and identifier[1] in managed
+        for identifier in device_entry.identifiers
+    )
+
+
+async def async_update_options(hass: HomeAssistant, entry: OSMConfigEntry) -> None:
+    """Reload the config entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: OSMConfigEntry) -> bool:
     """Unload a config entry."""
-    await entry.runtime_data.client.close()
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unload_ok:
+        await entry.runtime_data.writer.async_shutdown()
+        if entry.runtime_data.statistics is not None:
+            entry.runtime_data.statistics.async_flush(final=True)
+        await entry.runtime_data.cache.async_save(entry.runtime_data)
+        await entry.runtime_data.client.close()
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: OSMConfigEntry) -> None:
+    """Delete the persisted cache when the config entry is removed."""
+    await OSMStateCache(hass, entry.entry_id).async_remove()
@@ -0,0 +1,133 @@
+"""What-if simulation of the surplus allocation for OpenSurplusManager."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Literal, TypedDict
+
+from .core import OSMCore
+from .device import OSMDevice
+
+type AllocationReason = Literal[
+    "allocated", "cooldown", "disabled", "insufficient_surplus", "kept", "unknown"
+]
+
+
+class DeviceAllocation(TypedDict):
+    """Predicted state of one device and why."""
+
+    device: str
+    powered: bool
+    reason: AllocationReason
+
+
+class AllocationResult(TypedDict):
+    """Predicted powered devices and the surplus left over."""
+
+    powered: list[str]
+    leftover: float
+    worst_case_leftover: float
+    devices: list[DeviceAllocation]
+
+
+def simulate_allocation(
+    core: OSMCore,
+    devices: Sequence[OSMDevice],
+    switches: Mapping[str, tuple[bool, float]],
+    now: float,
+    *,
+    surplus: float | None = None,
+    grid_margin: float | None = None,
+    surplus_margin: float | None = None,
+    idle_power: float | None = None,
+) -> AllocationResult | None:
+    """Predict which devices the server powers, or None while the core is unknown.
+
+    The power budget is the surplus plus what the powered devices draw now.
+    Going through the devices in priority order, a powered device stays on
+    while the budget covers it within the grid margin and an off device is
+    turned on when the budget covers it with the surplus margin to spare.
+    Disabled devices and devices that switched less than their cooldown ago
+    keep their state. A powered device drawing no more than the idle power
+    counts with its actual consumption, any other with the expected one.
+    The worst case leftover assumes every powered device draws its maximum.
+    The keyword arguments replace the core values to ask what would happen
+    with them; switches maps device names to their state and the monotonic
+    time they took it. The devices must share one state store, as the
+    devices of a coordinator do.
+    """
+    surplus = core.surplus if surplus is None else surplus
+    grid_margin = core.grid_margin if grid_margin is None else grid_margin
+    surplus_margin = core.surplus_margin if surplus_margin is None else surplus_margin
+    idle_power = core.idle_power if idle_power is None else idle_power
+    if surplus is None or grid_margin is None or surplus_margin is None:
+        return None
+    if idle_power is None:
+        return None
+
+    if not devices:
+        return AllocationResult(
+            powered=[], leftover=surplus, worst_case_leftover=surplus, devices=[]
+        )
+    # Reading whole columns skips a descriptor and a decoder call per field.
+    store = devices[0].store
+    indices = [device.index for device in devices]
+    names = [device.device_name for device in devices]
+    consumptions = store.gather("consumption", indices)
+    powered_states = store.gather("powered", indices)
+
+    budget = surplus + sum(
+        consumption
+        for consumption, powered in zip(consumptions, powered_states, strict=True)
+        if powered and consumption is not None
+    )
+    headroom = 0.0
+    allocations: list[DeviceAllocation] = []
+    powered_names: list[str] = []
+    for name, consumption, state, enabled, expected, maximum, cooldown in zip(
+        names,
+        consumptions,
+        powered_states,
+        store.gather("enabled", indices),
+        store.gather("expected_consumption", indices),
+        store.gather("max_consumption", indices),
+        store.gather("cooldown", indices),
+        strict=True,
+    ):
+        powered = bool(state)
+        need = expected
+        if powered and consumption is not None and consumption <= idle_power:
+            need = consumption
+
+        reason: AllocationReason
+        if enabled is None or state is None or need is None:
+            reason = "unknown"
+            need = consumption or 0.0
+        elif not enabled:
+            reason = "disabled"
+        elif (
+            cooldown
+            and (switch := switches.get(name)) is not None
+            and now - switch[1] < cooldown
+        ):
+            reason = "cooldown"
+        elif powered:
+            powered = budget - need >= -grid_margin
+            reason = "kept" if powered else "insufficient_surplus"
+        else:
+            powered = budget - need >= surplus_margin
+            reason = "allocated" if powered else "insufficient_surplus"
+
+        if powered:
+            budget -= need
+            powered_names.append(name)
+            if maximum is not None and maximum > need:
+                headroom += maximum - need
+        allocations.append({"device": name, "powered": powered, "reason": reason})
+
+    return AllocationResult(
+        powered=powered_names,
+        leftover=budget,
+        worst_case_leftover=budget - headroom,
+        devices=allocations,
+    )
@@ -0,0 +1,100 @@
+"""Persisted topology and state cache for OpenSurplusManager."""
+
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import CACHE_SAVE_DELAY, CACHE_STORAGE_VERSION, DOMAIN
+
+if TYPE_CHECKING:
+    from .coordinator import OSMCoordinator
+    from .core import OSMCore
+    from .device import OSMDevice
+
+
+class CachedState(TypedDict):
+    """State of the core or a device, with the wall clock time it was fetched."""
+
+    updated_at: float | None
+    state: dict[str, Any]
+
+
+class CacheData(TypedDict):
+    """Layout of the stored cache."""
+
+    core: CachedState
+    devices: dict[str, CachedState]
+
+
+def _dump(state: OSMCore | OSMDevice) -> CachedState:
+    """Return the cached form of a core or device state."""
+    if (age := state.data_age) is None:
+        return {"updated_at": None, "state": {}}
+    return {"updated_at": time.time() - age, "state": state.as_dict()}
+
+
+def _load(state: OSMCore | OSMDevice, cached: CachedState, ttl: float) -> None:
+    """Restore a cached state unless it is already older than ttl seconds."""
+    if (updated_at := cached["updated_at"]) is None:
+        return
+    age = max(time.time() - updated_at, 0)
+    state.restore(cached["state"], time.monotonic() - age)
+    state.expire(ttl)
+
+
+class OSMStateCache:
+    """Device list and last known values of a config entry, kept in an HA Store.
+
+    Setup builds entities straight from the cache so it does not wait on the
+    server, and the restored values keep being served until they are older
+    than the staleness TTL, exactly like values from a failed refresh.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache."""
+        self._store: Store[CacheData] = Store(
+            hass, CACHE_STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+
+    async def async_load(self) -> CacheData | None:
+        """Return the stored cache, or None if nothing was saved yet."""
+        return await self._store.async_load()
+
+    @staticmethod
+    def restore(
+        data: CacheData, core: OSMCore, devices: list[OSMDevice], ttl: float
+    ) -> None:
+        """Seed the core and devices with the cached values."""
+        _load(core, data["core"], ttl)
+        for device in devices:
+            if (cached := data["devices"].get(device.device_name)) is not None:
+                _load(device, cached, ttl)
+
+    @callback
+    def async_delay_save(self, coordinator: OSMCoordinator) -> None:
+        """Schedule a save of the current coordinator state."""
+        self._store.async_delay_save(
+            lambda: self._serialize(coordinator), CACHE_SAVE_DELAY
+        )
+
+    async def async_save(self, coordinator: OSMCoordinator) -> None:
+        """Save the current coordinator state now."""
+        await self._store.async_save(self._serialize(coordinator))
+
+    async def async_remove(self) -> None:
+        """Delete the stored cache."""
+        await self._store.async_remove()
+
+    @staticmethod
+    def _serialize(coordinator: OSMCoordinator) -> CacheData:
+        """Return the cache layout for the current coordinator state."""
+        return {
+            "core": _dump(coordinator.core),
+            "devices": {
+                device.device_name: _dump(device) for device in coordinator.devices
+            },
+        }
@@ -0,0 +1,354 @@
+"""HTTP client for the OpenSurplusManager integration."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable
+import functools
+from http import HTTPStatus
+import time
+from types import SimpleNamespace
+from typing import Any, TypedDict, cast
+
+import aiohttp
+from aiohttp import hdrs
+import backoff
+from pyosmanager import APIError, OSMClient
+
+from homeassistant.util.json import json_loads
+
+from .const import (
+    CONNECTION_LIMIT,
+    DNS_CACHE_TTL,
+    REQUEST_LATENCY_BUCKETS,
+    REQUEST_TIMEOUT,
+)
+
+
+class CorePayload(TypedDict):
+    """Core state as decoded from the API."""
+
+    surplus: float
+    surplus_margin: float
+    grid_margin: float
+    idle_power: float
+
+
+class DevicePayload(TypedDict):
+    """Device state as decoded from the API."""
+
+    name: str
+    device_type: str
+    control_integration: str
+    expected_consumption: float
+    max_consumption: float | None
+    consumption: float
+    powered: bool
+    cooldown: int | None
+    enabled: bool
+
+
+class ConnectionStats:
+    """Count how many requests opened a new connection or reused one."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.created = 0
+        self.reused = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Return a trace config that feeds these counters."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_create)
+        trace_config.on_connection_reuseconn.append(self._on_reuse)
+        return trace_config
+
+    async def _on_create(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceConnectionCreateEndParams,
+    ) -> None:
+        self.created += 1
+
+    async def _on_reuse(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceConnectionReuseconnParams,
+    ) -> None:
+        self.reused += 1
+
+
+class EndpointStats:
+    """Call count, failures and latency histogram of one client method."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.successes = 0
+        self.errors = 0
+        self.last_error: str | None = None
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.buckets = [0] * (len(REQUEST_LATENCY_BUCKETS) + 1)
+
+    @property
+    def count(self) -> int:
+        """Return how many calls finished."""
+        return self.successes + self.errors
+
+    def record(self, latency: float, error: str | None) -> None:
+        """Count a finished call that took latency seconds."""
+        if error is None:
+            self.successes += 1
+        else:
+            self.errors += 1
+            self.last_error = error
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.buckets[bisect_left(REQUEST_LATENCY_BUCKETS, latency)] += 1
+
+    def percentile(self, percentile: float) -> float | None:
+        """Return the upper bound of the bucket holding percentile of the calls."""
+        if not self.count:
+            return None
+        rank = percentile * self.count
+        seen = 0
+        for bound, calls in zip(REQUEST_LATENCY_BUCKETS, self.buckets, strict=False):
+            seen += calls
+            if seen >= rank:
+                return bound
+        return self.max_latency
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters in a JSON serializable form."""
+        return {
+            "successes": self.successes,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "mean_latency": self.total_latency / self.count if self.count else None,
+            "p50_latency": self.percentile(0.5),
+            "p95_latency": self.percentile(0.95),
+            "max_latency": self.max_latency,
+            "histogram": dict(
+                zip(
+                    [*map(str, REQUEST_LATENCY_BUCKETS), "+Inf"],
+                    self.buckets,
+                    strict=True,
+                )
+            ),
+        }
+
+
+class ConditionalStats:
+    """Count how conditional fetches were answered."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.hits = 0
+        self.misses = 0
+        self.unsupported = 0
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the counters in a JSON serializable form."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "unsupported": self.unsupported,
+        }
+
+
+class RequestStats:
+    """Per client method call statistics."""
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.endpoints: dict[str, EndpointStats] = {}
+
+    def record(self, endpoint: str, latency: float, error: str | None) -> None:
+        """Count a finished call of endpoint."""
+        if (stats := self.endpoints.get(endpoint)) is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        stats.record(latency, error)
+
+    @property
+    def errors(self) -> int:
+        """Return the failed calls over all endpoints."""
+        return sum(stats.errors for stats in self.endpoints.values())
+
+    @property
+    def mean_latency(self) -> float | None:
+        """Return the mean latency over all endpoints."""
+        count = sum(stats.count for stats in self.endpoints.values())
+        if not count:
+            return None
+        return sum(stats.total_latency for stats in self.endpoints.values()) / count
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics in a JSON serializable form."""
+        return {endpoint: stats.as_dict() for endpoint, stats in self.endpoints.items()}
+
+
+def _instrumented[**P, R](
+    method: Callable[P, Awaitable[R]],
+) -> Callable[P, Awaitable[R]]:
+    """Record the latency and outcome of every call of a client method."""
+    endpoint = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        client: OSMHTTPClient = args[0]  # type: ignore[assignment]
+        started = time.perf_counter()
+        try:
+            result = await method(*args, **kwargs)
+        except Exception as err:
+            client.request_stats.record(
+                endpoint, time.perf_counter() - started, repr(err)
+            )
+            raise
+        client.request_stats.record(
+            endpoint,
+            time.perf_counter() - started,
+            # is_healthy reports failures through its result.
+            "unhealthy" if result is False else None,
+        )
+        return result
+
+    return wrapper
+
+
+class OSMHTTPClient(OSMClient):
+    """OSMClient running on a session owned by the integration.
+
+    OSMClient opens a private session with default settings in its
+    constructor, so the parent initializer is deliberately not called.
+    Every API call is timed and counted in request_stats.
+
+    The *_if_modified methods send the ETag of the last response of their
+    endpoint in If-None-Match and return None when the server answers 304
+    Not Modified, skipping the body and its parsing. Against a server that
+    sends no ETag they always return the state. They decode with orjson and
+    return the payloads as they are, without building response objects, for
+    the core and the devices to copy into their state.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        session: aiohttp.ClientSession,
+        connection_stats: ConnectionStats | None = None,
+        request_stats: RequestStats | None = None,
+    ) -> None:
+        """Initialize the client."""
+        self.base_url = base_url
+        self.session = session
+        self.connection_stats = connection_stats or ConnectionStats()
+        self.request_stats = request_stats or RequestStats()
+        self.conditional_stats = ConditionalStats()
+        self._etags: dict[str, str] = {}
+
+    async def _get_if_modified(self, endpoint: str) -> Any:
+        """Return the JSON of endpoint, or None if it did not change since.
+
+        Raise APIError for any failed request, including the connection
+        errors and timeouts still failing after the retries and undecodable
+        bodies.
+        """
+        try:
+            return await self._fetch_if_modified(endpoint)
+        except (aiohttp.ClientError, TimeoutError, ValueError) as err:
+            raise APIError(f"API request failed: {err}") from err
+
+    @backoff.on_exception(
+        backoff.expo, (aiohttp.ClientError, TimeoutError), max_tries=3
+    )
+    async def _fetch_if_modified(self, endpoint: str) -> Any:
+        """Return the JSON of endpoint, or None if it did not change since."""
+        headers = {}
+        if (etag := self._etags.get(endpoint)) is not None:
+            headers[hdrs.IF_NONE_MATCH] = etag
+        try:
+            async with self.session.get(
+                f"{self.base_url}/api/{endpoint}", headers=headers
+            ) as response:
+                if response.status == HTTPStatus.NOT_MODIFIED:
+                    self.conditional_stats.hits += 1
+                    return None
+                response.raise_for_status()
+                data = json_loads(await response.read())
+        except aiohttp.ClientResponseError as err:
+            # Connection errors reach backoff so they are retried.
+            raise APIError(f"API request failed: {err}") from err
+
+        if (etag := response.headers.get(hdrs.ETAG)) is None:
+            self.conditional_stats.unsupported += 1
+            self._etags.pop(endpoint, None)
+        else:
+            self.conditional_stats.misses += 1
+            self._etags[endpoint] = etag
+        return data
+
+    @_instrumented
+    async def get_core_state_if_modified(self) -> CorePayload | None:
+        """Return the core state, or None if it did not change since."""
+        return cast(CorePayload | None, await self._get_if_modified("core"))
+
+    @_instrumented
+    async def get_devices_if_modified(self) -> list[DevicePayload] | None:
+        """Return every device, or None if none changed since."""
+        return cast(list[DevicePayload] | None, await self._get_if_modified("devices"))
+
+    @_instrumented
+    async def get_device_if_modified(self, device_name: str) -> DevicePayload | None:
+        """Return a device, or None if it did not change since."""
+        return cast(
+            DevicePayload | None, await self._get_if_modified(f"device/{device_name}")
+        )
+
+    def forget(self, device_name: str) -> None:
+        """Drop the ETag kept for a device that is gone or expired."""
+        self._etags.pop(f"device/{device_name}", None)
+
+    def forget_core(self) -> None:
+        """Drop the ETag kept for the core state once it expired."""
+        self._etags.pop("core", None)
+
+    def forget_devices(self) -> None:
+        """Drop the ETag kept for the bulk device list once a device expired."""
+        self._etags.pop("devices", None)
+
+    is_healthy = _instrumented(OSMClient.is_healthy)
+    get_core_state = _instrumented(OSMClient.get_core_state)
+    get_devices = _instrumented(OSMClient.get_devices)
+    get_device = _instrumented(OSMClient.get_device)
+    set_surplus_margin = _instrumented(OSMClient.set_surplus_margin)
+    set_grid_margin = _instrumented(OSMClient.set_grid_margin)
+    set_idle_power = _instrumented(OSMClient.set_idle_power)
+    set_device_max_consumption = _instrumented(OSMClient.set_device_max_consumption)
+    set_device_expected_consumption = _instrumented(
+        OSMClient.set_device_expected_consumption
+    )
+    set_device_cooldown = _instrumented(OSMClient.set_device_cooldown)
+
+
+def create_pooled_client(base_url: str, keepalive_timeout: float) -> OSMHTTPClient:
+    """Create a client with its own keep-alive connection pool.
+
+    The pool keeps idle connections open for keepalive_timeout seconds, which
+    should outlast the gap between refresh cycles, and caches DNS results, so
+    a cycle does not pay for TCP setup or name resolution again.
+    Requests time out well before the default aiohttp limit of five minutes.
+    """
+    stats = ConnectionStats()
+    connector = aiohttp.TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=keepalive_timeout,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        trace_configs=[stats.trace_config()],
+    )
+    return OSMHTTPClient(base_url, session, stats)
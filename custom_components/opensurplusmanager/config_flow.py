@@ -5,15 +5,49 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from pyosmanager import OSMClient
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_HOST
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
-
-from .const import DOMAIN
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .client import OSMHTTPClient
+from .const import (
+    CONF_LONG_TERM_STATISTICS,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MAX_SILENCE,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_NUMBER_DEADBAND_ABSOLUTE,
+    CONF_NUMBER_DEADBAND_RELATIVE,
+    CONF_PUSH_UPDATES,
+    CONF_SENSOR_DEADBAND_ABSOLUTE,
+    CONF_SENSOR_DEADBAND_RELATIVE,
+    CONF_SLOW_UPDATE_THRESHOLD,
+    CONF_STALE_TTL,
+    CONF_STARTUP_TIMEOUT,
+    DEFAULT_LONG_TERM_STATISTICS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_NUMBER_DEADBAND_ABSOLUTE,
+    DEFAULT_NUMBER_DEADBAND_RELATIVE,
+    DEFAULT_PUSH_UPDATES,
+    DEFAULT_SENSOR_DEADBAND_ABSOLUTE,
+    DEFAULT_SENSOR_DEADBAND_RELATIVE,
+    DEFAULT_SLOW_UPDATE_THRESHOLD,
+    DEFAULT_STALE_TTL,
+    DEFAULT_STARTUP_TIMEOUT,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,12 +67,11 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     if len(data[CONF_HOST]) < 3:
         raise InvalidHost
 
-    client = OSMClient(data[CONF_HOST])
+    client = OSMHTTPClient(data[CONF_HOST], async_get_clientsession(hass))
 
-    async with client:
-        result = await client.is_healthy()
-        if not result:
-            raise CannotConnect
+    result = await client.is_healthy()
+    if not result:
+        raise CannotConnect
 
     return {"title": data[CONF_HOST]}
 
@@ -47,6 +80,13 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Open Surplus Manager."""
 
     VERSION = 1
+    MINOR_VERSION = 2
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Create the options flow."""
+        return OptionsFlowHandler()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -54,6 +94,8 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
         """Handle the initial step."""
         errors: dict[str, str] = {}
         if user_input is not None:
+            await self.async_set_unique_id(user_input[CONF_HOST])
+            self._abort_if_unique_id_configured()
             try:
                 info = await validate_input(self.hass, user_input)
             except CannotConnect:
@@ -69,6 +111,95 @@ class ConfigFlow(ConfigFlow, domain=DOMAIN):
         )
 
 
+class OptionsFlowHandler(OptionsFlow):
+    """Handle the options for Open Surplus Manager."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL,
+                    default=options.get(
+                        CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL,
+                    default=options.get(
+                        CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(
+                    CONF_MAX_CONCURRENT_REQUESTS,
+                    default=options.get(
+                        CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=64)),
+                vol.Required(
+                    CONF_STARTUP_TIMEOUT,
+                    default=options.get(CONF_STARTUP_TIMEOUT, DEFAULT_STARTUP_TIMEOUT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+                vol.Required(
+                    CONF_STALE_TTL,
+                    default=options.get(CONF_STALE_TTL, DEFAULT_STALE_TTL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(
+                    CONF_PUSH_UPDATES,
+                    default=options.get(CONF_PUSH_UPDATES, DEFAULT_PUSH_UPDATES),
+                ): bool,
+                vol.Required(
+                    CONF_SENSOR_DEADBAND_ABSOLUTE,
+                    default=options.get(
+                        CONF_SENSOR_DEADBAND_ABSOLUTE, DEFAULT_SENSOR_DEADBAND_ABSOLUTE
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Required(
+                    CONF_SENSOR_DEADBAND_RELATIVE,
+                    default=options.get(
+                        CONF_SENSOR_DEADBAND_RELATIVE, DEFAULT_SENSOR_DEADBAND_RELATIVE
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Required(
+                    CONF_NUMBER_DEADBAND_ABSOLUTE,
+                    default=options.get(
+                        CONF_NUMBER_DEADBAND_ABSOLUTE, DEFAULT_NUMBER_DEADBAND_ABSOLUTE
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Required(
+                    CONF_NUMBER_DEADBAND_RELATIVE,
+                    default=options.get(
+                        CONF_NUMBER_DEADBAND_RELATIVE, DEFAULT_NUMBER_DEADBAND_RELATIVE
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                vol.Required(
+                    CONF_MAX_SILENCE,
+                    default=options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(
+                    CONF_SLOW_UPDATE_THRESHOLD,
+                    default=options.get(
+                        CONF_SLOW_UPDATE_THRESHOLD, DEFAULT_SLOW_UPDATE_THRESHOLD
+                    ),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.001)),
+                vol.Required(
+                    CONF_LONG_TERM_STATISTICS,
+                    default=options.get(
+                        CONF_LONG_TERM_STATISTICS, DEFAULT_LONG_TERM_STATISTICS
+                    ),
+                ): bool,
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema)
+
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -1,3 +1,135 @@
 """Constants for the Open Surplus Manager integration."""
 
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.util.hass_dict import HassKey
+
+if TYPE_CHECKING:
+    from .scheduler import RefreshStagger
+
 DOMAIN = "opensurplusmanager"
+
+# Shared by the config entries of every configured server.
+DATA_STAGGER: HassKey[RefreshStagger] = HassKey(DOMAIN)
+
+ATTR_DATA_AGE = "data_age"
+ATTR_MIN = "min"
+ATTR_MAX = "max"
+ATTR_VARIANCE = "variance"
+ATTR_PERCENTILE_10 = "percentile_10"
+ATTR_MEDIAN = "median"
+ATTR_PERCENTILE_90 = "percentile_90"
+ATTR_POWERED_DEVICES = "powered_devices"
+ATTR_WORST_CASE_LEFTOVER = "worst_case_leftover"
+
+# Idle connections stay open for this many of the entry's slowest refresh
+# intervals, the maximum scan interval or the push safety poll, so
+# consecutive cycles reuse them even when a cycle is moved up to half an
+# interval to line up with the entry's stagger slot.
+CONNECTION_LIMIT = 10
+DNS_CACHE_TTL = 300
+KEEPALIVE_INTERVALS = 2
+# A request that takes longer than the default shortest refresh interval
+# fails, so a hung server cannot hold a refresh cycle for minutes.
+REQUEST_TIMEOUT = 10
+
+# Upper bounds in seconds of the request latency histogram buckets; slower
+# requests land in a final overflow bucket.
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MIN_SCAN_INTERVAL = 10
+DEFAULT_MAX_SCAN_INTERVAL = 60
+
+# Surplus standard deviation (W) and number of powered flips per cycle at which
+# the scheduler polls as fast as allowed.
+SCHEDULER_VOLATILITY_REFERENCE = 100.0
+SCHEDULER_ACTIVITY_REFERENCE = 2
+SCHEDULER_WINDOW = 10
+
+CONF_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+
+CONF_STARTUP_TIMEOUT = "startup_timeout"
+DEFAULT_STARTUP_TIMEOUT = 30
+
+CONF_STALE_TTL = "stale_ttl"
+DEFAULT_STALE_TTL = 300
+
+CONF_PUSH_UPDATES = "push_updates"
+DEFAULT_PUSH_UPDATES = False
+
+PUSH_FALLBACK_INTERVAL = timedelta(minutes=5)
+PUSH_RECONNECT_MIN_DELAY = 1
+PUSH_RECONNECT_MAX_DELAY = 60
+PUSH_READ_TIMEOUT = 120
+
+CONF_SENSOR_DEADBAND_ABSOLUTE = "sensor_deadband_absolute"
+CONF_SENSOR_DEADBAND_RELATIVE = "sensor_deadband_relative"
+CONF_NUMBER_DEADBAND_ABSOLUTE = "number_deadband_absolute"
+CONF_NUMBER_DEADBAND_RELATIVE = "number_deadband_relative"
+CONF_MAX_SILENCE = "max_silence"
+DEFAULT_SENSOR_DEADBAND_ABSOLUTE = 1.0
+DEFAULT_SENSOR_DEADBAND_RELATIVE = 0.0
+DEFAULT_NUMBER_DEADBAND_ABSOLUTE = 0.0
+DEFAULT_NUMBER_DEADBAND_RELATIVE = 0.0
+DEFAULT_MAX_SILENCE = 300
+
+WRITE_DEBOUNCE = 0.5
+
+# The persisted topology and state cache is written at most once per delay.
+CACHE_STORAGE_VERSION = 1
+CACHE_SAVE_DELAY = 60
+
+# Energy is not integrated across samples further apart than this many
+# seconds, such as restarts or long outages.
+ENERGY_MAX_GAP = 600
+
+# Rolling statistics windows in seconds. Each window keeps at most one
+# sample per ROLLING_SAMPLE_SPACING seconds, skipping closer ones, which
+# bounds its ring buffer, and estimates percentiles within
+# ROLLING_QUANTILE_ACCURACY relative error from at most ROLLING_QUANTILE_BINS
+# bins per sign.
+ROLLING_WINDOWS = (60, 300, 900)
+ROLLING_SAMPLE_SPACING = 1
+ROLLING_QUANTILE_ACCURACY = 0.01
+ROLLING_QUANTILE_BINS = 256
+
+# Surplus forecast horizons in seconds. The trend is fitted to at most
+# FORECAST_HISTORY seconds of readings, weighting each one half as much
+# every FORECAST_HALF_LIFE seconds of age, and damped over
+# FORECAST_TREND_DAMPING seconds when extrapolated. Trends are only trusted
+# once the readings span about FORECAST_MIN_SPAN seconds.
+FORECAST_HORIZONS = (60, 300, 900)
+FORECAST_HISTORY = 900
+FORECAST_MAX_SAMPLES = 1024
+FORECAST_MIN_SAMPLES = 3
+FORECAST_MIN_SPAN = 60
+FORECAST_HALF_LIFE = 120
+FORECAST_TREND_DAMPING = 300
+
+# Opt-in long-term statistics: readings are aggregated into buckets of
+# STATISTICS_BUCKET seconds, which are rolled up into the hourly statistics
+# the recorder accepts from external sources. The running hour is imported
+# again whenever a bucket closes. Power sensors then write their raw state
+# at most once per STATISTICS_RAW_WRITE_INTERVAL seconds.
+CONF_LONG_TERM_STATISTICS = "long_term_statistics"
+DEFAULT_LONG_TERM_STATISTICS = False
+STATISTICS_BUCKET = 300
+STATISTICS_PERIOD = 3600
+STATISTICS_RAW_WRITE_INTERVAL = 60
+
+# Device fields that can be written, by number entities or in bulk.
+DEVICE_PARAMETERS = ("max_consumption", "expected_consumption", "cooldown")
+
+# A single update step or entity write holding the event loop longer than
+# this many seconds is logged as a warning.
+CONF_SLOW_UPDATE_THRESHOLD = "slow_update_threshold"
+DEFAULT_SLOW_UPDATE_THRESHOLD = 0.1
+
+# Number of functions logged and returned by the profile service.
+PROFILE_HOTSPOTS = 20
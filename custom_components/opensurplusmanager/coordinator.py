@@ -1,20 +1,487 @@
 """Coordinator for OpenSurplusManager."""
 
-from pyosmanager import OSMClient
+import asyncio
+from collections.abc import Callable
+from datetime import timedelta
+import functools
+import logging
+import math
+import time
+from typing import TypedDict
+
+from pyosmanager import APIError
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .allocation import AllocationResult, simulate_allocation
+from .cache import OSMStateCache
+from .client import DevicePayload, OSMHTTPClient
+from .const import (
+    CONF_LONG_TERM_STATISTICS,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MAX_SILENCE,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_SLOW_UPDATE_THRESHOLD,
+    CONF_STALE_TTL,
+    DATA_STAGGER,
+    DEFAULT_LONG_TERM_STATISTICS,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_SLOW_UPDATE_THRESHOLD,
+    DEFAULT_STALE_TTL,
+    DOMAIN,
+    PUSH_FALLBACK_INTERVAL,
+)
 from .core import OSMCore
 from .device import OSMDevice
+from .energy import EnergyAccumulator
+from .forecast import SurplusForecast
+from .long_term import LongTermStatistics
+from .profiler import check_blocking, watch_blocking
+from .push import OSMPushListener
+from .rolling import RollingWindow
+from .scheduler import AdaptiveInterval
+from .state_store import DeviceStateStore
+from .writer import OSMWriteQueue, Setter
+
+_LOGGER = logging.getLogger(__name__)
 
 type OSMConfigEntry = ConfigEntry[OSMCoordinator]
 
 
-class OSMCoordinator:
-    """Representation of a OpenSurplusManager Coordinator in order to get share the core and device object between platforms."""
+class ParameterResult(TypedDict):
+    """Outcome of a single write of a batch of device parameters."""
+
+    device: str
+    field: str
+    value: float
+    success: bool
+    error: str | None
+
+
+class OSMCoordinator(DataUpdateCoordinator[int]):
+    """Representation of a OpenSurplusManager Coordinator in order to get share the core and device object between platforms.
 
-    def __init__(self, client: OSMClient, core: OSMCore, devices: list[OSMDevice]):
+    Each refresh fetches the core and the devices, keeps serving the last
+    known state while the server is unreachable and only notifies entities
+    when a state changed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: OSMConfigEntry,
+        client: OSMHTTPClient,
+        core: OSMCore,
+        device_names: list[str],
+        *,
+        cache: OSMStateCache,
+    ):
         """Initialize the coordinator."""
+        self.scheduler = AdaptiveInterval(
+            entry.options.get(CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL),
+            entry.options.get(CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL),
+        )
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=entry,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=self.scheduler.interval),
+            always_update=False,
+        )
+        self.refresh_interval = self.scheduler.interval
         self.client = client
         self.core = core
-        self.devices = devices
+        self.states = DeviceStateStore()
+        self.devices = [
+            OSMDevice(client, name, self.states, core.unique_id)
+            for name in device_names
+        ]
+        self.cache = cache
+        self.energy: dict[tuple[str, str], EnergyAccumulator] = {}
+        self.windows: dict[
+            tuple[str, str, int], tuple[OSMCore | OSMDevice, RollingWindow]
+        ] = {}
+        self.forecast = SurplusForecast(hass, entry)
+        self.switches: dict[str, tuple[bool, float]] = {}
+        self.statistics: LongTermStatistics | None = None
+        if entry.options.get(CONF_LONG_TERM_STATISTICS, DEFAULT_LONG_TERM_STATISTICS):
+            if "recorder" in hass.config.components:
+                self.statistics = LongTermStatistics(hass, core.unique_id, entry.title)
+            else:
+                _LOGGER.warning(
+                    "Long-term statistics are enabled but the recorder is not loaded"
+                )
+        self.push: OSMPushListener | None = None
+        self.first_refresh: asyncio.Task[None] | None = None
+        self.writer = OSMWriteQueue(hass, self.async_update_listeners)
+        self.cold_start_duration: float | None = None
+        self.last_refresh_duration: float | None = None
+        self._stale_ttl = entry.options.get(CONF_STALE_TTL, DEFAULT_STALE_TTL)
+        self._max_silence = entry.options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE)
+        self._revision = 0
+        self._last_change = -math.inf
+        self._bulk_names: set[str] = set()
+        self._stale: set[OSMCore | OSMDevice] = set()
+        self.slow_threshold = entry.options.get(
+            CONF_SLOW_UPDATE_THRESHOLD, DEFAULT_SLOW_UPDATE_THRESHOLD
+        )
+        self._device_listeners: list[Callable[[list[OSMDevice]], None]] = []
+        self._semaphore = asyncio.Semaphore(
+            entry.options.get(
+                CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS
+            )
+        )
+
+    async def wait_for_initialization(self, timeout: float) -> bool:
+        """Wait until the core and every device received their first state."""
+        results = await asyncio.gather(
+            self.core.wait_for_initialization(timeout),
+            *(device.wait_for_initialization(timeout) for device in self.devices),
+        )
+        return all(results)
+
+    @callback
+    def async_add_device_listener(
+        self, listener: Callable[[list[OSMDevice]], None]
+    ) -> CALLBACK_TYPE:
+        """Call listener with the devices discovered after setup."""
+        self._device_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._device_listeners.remove(listener)
+
+        return remove_listener
+
+    def energy_accumulator(
+        self, target: OSMCore | OSMDevice, field: str
+    ) -> EnergyAccumulator:
+        """Return the accumulator integrating field of the core or a device."""
+        key = (target.device_name, field)
+        if (accumulator := self.energy.get(key)) is None:
+            accumulator = self.energy[key] = EnergyAccumulator()
+        return accumulator
+
+    @callback
+    def async_track_window(
+        self, target: OSMCore | OSMDevice, field: str, window: int
+    ) -> RollingWindow:
+        """Start keeping rolling statistics of field of the core or a device."""
+        key = (target.device_name, field, window)
+        if (tracked := self.windows.get(key)) is None:
+            tracked = self.windows[key] = (target, RollingWindow(window))
+            if (value := getattr(target, field)) is not None and (
+                timestamp := target.last_updated
+            ) is not None:
+                tracked[1].add(value, timestamp)
+        return tracked[1]
+
+    @callback
+    def async_untrack_window(
+        self, target: OSMCore | OSMDevice, field: str, window: int
+    ) -> None:
+        """Stop keeping rolling statistics of field of the core or a device."""
+        self.windows.pop((target.device_name, field, window), None)
+
+    def record_readings(self) -> None:
+        """Feed the latest readings to the energy, forecast and statistics.
+
+        Also notes when each device last switched, for the allocation cooldowns.
+        """
+        now = time.monotonic()
+        self.energy_accumulator(self.core, "surplus").add(
+            self.core.surplus, self.core.last_updated
+        )
+        switches = self.switches
+        for device in self.devices:
+            self.energy_accumulator(device, "consumption").add(
+                device.consumption, device.last_updated
+            )
+            if (powered := device.powered) is not None:
+                if (switch := switches.get(device.device_name)) is None:
+                    # When a device last switched before we saw it is unknown.
+                    switches[device.device_name] = (powered, -math.inf)
+                elif switch[0] != powered:
+                    switches[device.device_name] = (powered, now)
+
+        self.forecast.async_add(self.core.surplus, self.core.last_updated)
+
+        if (statistics := self.statistics) is not None:
+            # Readings carry monotonic timestamps, statistics need wall time.
+            offset = time.time() - now
+            if (timestamp := self.core.last_updated) is not None:
+                statistics.add("core", "surplus", self.core.surplus, timestamp + offset)
+            for device in self.devices:
+                if (timestamp := device.last_updated) is not None:
+                    statistics.add(
+                        device.device_name,
+                        "consumption",
+                        device.consumption,
+                        timestamp + offset,
+                    )
+            statistics.async_flush()
+
+        for (_, field, _), (target, window) in self.windows.items():
+            if (value := getattr(target, field)) is not None and (
+                timestamp := target.last_updated
+            ) is not None:
+                window.add(value, timestamp)
+            window.expire(now)
+
+    @property
+    def data_age(self) -> float | None:
+        """Return how many seconds ago any state was last fetched successfully."""
+        ages = [
+            age
+            for age in (
+                self.core.data_age,
+                *(device.data_age for device in self.devices),
+            )
+            if age is not None
+        ]
+        return min(ages, default=None)
+
+    def is_stale(self, target: OSMCore | OSMDevice) -> bool:
+        """Return whether the last refresh failed to fetch the target."""
+        return target in self._stale
+
+    def get_device(self, device_name: str | None) -> OSMDevice | None:
+        """Return the device with the given name, if it is managed."""
+        for device in self.devices:
+            if device.device_name == device_name:
+                return device
+        return None
+
+    def simulate_allocation(self, **overrides: float | None) -> AllocationResult | None:
+        """Predict the powered devices, replacing core values with overrides."""
+        return simulate_allocation(
+            self.core, self.devices, self.switches, time.monotonic(), **overrides
+        )
+
+    def refresh_update_interval(self) -> None:
+        """Apply the interval matching the current push and scheduler state.
+
+        The next refresh is moved to this server's slot on the grid shared
+        with the other servers, so they take turns.
+        """
+        if self.push is not None and self.push.connected:
+            self.refresh_interval = PUSH_FALLBACK_INTERVAL.total_seconds()
+        else:
+            self.refresh_interval = self.scheduler.interval
+        now = self.hass.loop.time()
+        next_refresh = self.hass.data[DATA_STAGGER].next_refresh(
+            self.config_entry.entry_id, now, self.refresh_interval
+        )
+        self.update_interval = timedelta(seconds=next_refresh - now)
+
+    async def async_set_device_parameters(
+        self, parameters: list[tuple[str, str, float]]
+    ) -> list[ParameterResult]:
+        """Write (device, field, value) parameters and refresh once afterwards.
+
+        The writes go through the write queue, so they are ordered with the
+        ones made from entities, and run concurrently within the request
+        limit. A failed write rolls back its own value only and is reported
+        in its result.
+        """
+        results = await asyncio.gather(
+            *(
+                self._async_set_device_parameter(device_name, field, value)
+                for device_name, field, value in parameters
+            )
+        )
+        await self.async_refresh()
+        return results
+
+    async def _async_set_device_parameter(
+        self, device_name: str, field: str, value: float
+    ) -> ParameterResult:
+        """Write a single device parameter and report how it went."""
+        result = ParameterResult(
+            device=device_name, field=field, value=value, success=False, error=None
+        )
+        if (device := self.get_device(device_name)) is None:
+            result["error"] = "Unknown device"
+            return result
+
+        device.set_optimistic(field, value)
+        try:
+            await self.writer.async_write(
+                (device_name, field),
+                value,
+                functools.partial(
+                    self._async_limited_write, getattr(device, f"async_set_{field}")
+                ),
+            )
+        except Exception as err:  # noqa: BLE001
+            # Logged by the write queue, reported here as this item's failure.
+            result["error"] = str(err) or type(err).__name__
+        else:
+            result["success"] = True
+        return result
+
+    async def _async_limited_write(self, setter: Setter, value: float) -> None:
+        """Call setter without exceeding the request limit."""
+        async with self._semaphore:
+            await setter(value)
+
+    def next_revision(self) -> int:
+        """Return a new revision for data that changed."""
+        self._last_change = time.monotonic()
+        self._revision += 1
+        return self._revision
+
+    async def _async_update_data(self) -> int:
+        """Fetch the core and all devices in a single cycle."""
+        started = time.monotonic()
+        core_changed, devices_changed = await asyncio.gather(
+            watch_blocking(
+                self.core.async_update(), self.slow_threshold, "Updating the core"
+            ),
+            watch_blocking(
+                self._async_update_devices(), self.slow_threshold, "Updating devices"
+            ),
+        )
+        self.last_refresh_duration = time.monotonic() - started
+
+        processing = time.perf_counter()
+        changed = core_changed or devices_changed
+        # A 304 would keep an expired state unknown, so refetch it in full.
+        if self.core.expire(self._stale_ttl):
+            self.client.forget_core()
+            changed = True
+        for device in self.devices:
+            if device.expire(self._stale_ttl):
+                self.client.forget(device.device_name)
+                self.client.forget_devices()
+                self._bulk_names.discard(device.device_name)
+                changed = True
+        self.record_readings()
+
+        self.scheduler.update(
+            self.core.surplus,
+            {device.device_name: device.powered for device in self.devices},
+        )
+        self.refresh_update_interval()
+        if changed:
+            self.cache.async_delay_save(self)
+        check_blocking(processing, self.slow_threshold, "Processing readings")
+        # Entities write once when a state fails to refresh and once more
+        # when it refreshes again, so the data age they show is current.
+        stale = {
+            target
+            for target in (self.core, *self.devices)
+            if target.last_updated is not None and target.last_updated < started
+        }
+        stale_changed = stale != self._stale
+        self._stale = stale
+        if (
+            changed
+            or stale_changed
+            or time.monotonic() - self._last_change >= self._max_silence
+        ):
+            return self.next_revision()
+        return self._revision
+
+    async def _async_update_devices(self) -> bool:
+        """Update every device from a bulk snapshot, falling back per device.
+
+        Return whether any device got a new state.
+        """
+        by_name: dict[str, DevicePayload] = {}
+        unchanged: set[str] = set()
+        modified = False
+        try:
+            states = await self.client.get_devices_if_modified()
+        except APIError:
+            _LOGGER.debug("Bulk device fetch failed, fetching devices one by one")
+        else:
+            if states is None:
+                unchanged = self._bulk_names
+            else:
+                by_name = {state["name"]: state for state in states}
+                self._bulk_names = set(by_name)
+                modified = True
+                self._async_sync_devices(by_name)
+
+        missing = []
+        for device in self.devices:
+            if (state := by_name.get(device.device_name)) is not None:
+                device.update_from_payload(state)
+            elif device.device_name in unchanged:
+                device.mark_fresh()
+            else:
+                missing.append(device)
+
+        if missing:
+            results = await asyncio.gather(
+                *(self._async_update_device(device) for device in missing)
+            )
+            modified = any(results) or modified
+        return modified
+
+    @callback
+    def _async_sync_devices(self, states: dict[str, DevicePayload]) -> None:
+        """Add devices new on the server and remove the ones that are gone."""
+        known = {device.device_name for device in self.devices}
+        added = [
+            OSMDevice(self.client, name, self.states, self.core.unique_id)
+            for name in states
+            if name not in known
+        ]
+        removed = [
+            device for device in self.devices if device.device_name not in states
+        ]
+        if removed:
+            device_registry = dr.async_get(self.hass)
+            for device in removed:
+                _LOGGER.info(
+                    "Device %s was removed from the server", device.device_name
+                )
+                self.devices.remove(device)
+                self.states.release(device.index)
+                self.energy.pop((device.device_name, "consumption"), None)
+                self.switches.pop(device.device_name, None)
+                self.client.forget(device.device_name)
+                if self.statistics is not None:
+                    self.statistics.remove(device.device_name, "consumption")
+                for key in [
+                    key for key in self.windows if key[0] == device.device_name
+                ]:
+                    del self.windows[key]
+                if device_entry := device_registry.async_get_device(
+                    identifiers=device.device_info["identifiers"]
+                ):
+                    device_registry.async_update_device(
+                        device_entry.id,
+                        remove_config_entry_id=self.config_entry.entry_id,
+                    )
+
+        if added:
+            _LOGGER.info(
+                "Discovered new devices: %s",
+                ", ".join(device.device_name for device in added),
+            )
+            for device in added:
+                device.update_from_payload(states[device.device_name])
+            self.devices.extend(added)
+            for listener in self._device_listeners:
+                listener(added)
+
+    async def _async_update_device(self, device: OSMDevice) -> bool:
+        """Fetch a single device without exceeding the concurrency limit."""
+        async with self._semaphore:
+            return await watch_blocking(
+                device.async_update(),
+                self.slow_threshold,
+                "Updating %s",
+                device.device_name,
+            )
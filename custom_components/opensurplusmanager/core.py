@@ -1,50 +1,125 @@
 """Core module for OpenSurplusManager integration."""
 
 import asyncio
+import logging
+import time
+from typing import Any
 
-from pyosmanager import APIError, OSMClient
+from pyosmanager import APIError
 
+from homeassistant.helpers.device_registry import DeviceInfo
 
-class OSMCore:
+from .client import OSMHTTPClient
+from .const import DOMAIN
+from .optimistic import OptimisticState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OSMCore(OptimisticState):
     """Base representation of a OpenSurplusManager Core."""
 
-    def __init__(self, client: OSMClient):
-        """Initialize the surplus."""
+    FIELDS = ("surplus", "grid_margin", "surplus_margin", "idle_power")
+
+    device_name = "core"
+
+    def __init__(self, client: OSMHTTPClient, scope: str):
+        """Initialize the surplus of the server identified by scope."""
+        super().__init__()
         self.client = client
+        self.unique_id = scope
+        self.device_info = DeviceInfo(identifiers={(DOMAIN, scope)}, name="Core")
         self.surplus: float | None = None
         self.grid_margin: float | None = None
         self.surplus_margin: float | None = None
         self.idle_power: float | None = None
-        self._initialized = False
+        self.last_updated: float | None = None
+        self._initialized = asyncio.Event()
+
+    async def wait_for_initialization(self, timeout: float) -> bool:
+        """Wait until the core is initialized, giving up after timeout seconds."""
+        try:
+            async with asyncio.timeout(timeout):
+                await self._initialized.wait()
+        except TimeoutError:
+            return False
+        return True
+
+    @property
+    def data_age(self) -> float | None:
+        """Return how many seconds ago the state was last refreshed."""
+        if self.last_updated is None:
+            return None
+        return time.monotonic() - self.last_updated
 
-    async def wait_for_initialization(self):
-        """Wait until the core is initialized."""
-        while not self._initialized:
-            await asyncio.sleep(1)
+    async def async_update(self) -> bool:
+        """Update the surplus, keeping the last known state if the fetch fails.
 
-    async def async_update(self):
-        """Update the surplus."""
+        Return whether a new state was applied.
+        """
         try:
-            state = await self.client.get_core_state()
-            self.surplus = state.surplus
-            self.grid_margin = state.grid_margin
-            self.surplus_margin = state.surplus_margin
-            self.idle_power = state.idle_power
-            self._initialized = True
-        except APIError:
-            self.surplus = None
-            self.grid_margin = None
-            self.surplus_margin = None
-            self.idle_power = None
+            state = await self.client.get_core_state_if_modified()
+        except APIError as err:
+            _LOGGER.debug("Failed to fetch the core state: %s", err)
+            return False
+
+        if state is None:
+            self.last_updated = time.monotonic()
+            return False
+
+        self.surplus = state["surplus"]
+        self.grid_margin = state["grid_margin"]
+        self.surplus_margin = state["surplus_margin"]
+        self.idle_power = state["idle_power"]
+        self.last_updated = time.monotonic()
+        self._reconcile_optimistic()
+        self._initialized.set()
+        return True
+
+    def expire(self, ttl: float) -> bool:
+        """Forget the cached state once it is older than ttl seconds.
+
+        Return whether a known state was forgotten.
+        """
+        if (age := self.data_age) is not None and age <= ttl:
+            return False
+
+        known = any(getattr(self, field) is not None for field in self.FIELDS)
+        self.surplus = None
+        self.grid_margin = None
+        self.surplus_margin = None
+        self.idle_power = None
+        return known
+
+    def apply_delta(self, delta: dict[str, Any]):
+        """Apply a partial core state pushed by the server."""
+        for field in self.FIELDS:
+            if field in delta:
+                setattr(self, field, delta[field])
+        self.last_updated = time.monotonic()
+        self._reconcile_optimistic()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the current state as a plain dict."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def restore(self, state: dict[str, Any], last_updated: float):
+        """Restore a cached state that was fetched at last_updated."""
+        self.apply_delta(state)
+        self.last_updated = last_updated
 
     async def async_set_grid_margin(self, value: float):
         """Update the grid margin."""
-        await self.client.set_grid_margin(value)
+        await self._async_write(
+            "grid_margin", value, self.client.set_grid_margin(value)
+        )
 
     async def async_set_surplus_margin(self, value: float):
         """Update the surplus margin."""
-        await self.client.set_surplus_margin(value)
+        await self._async_write(
+            "surplus_margin", value, self.client.set_surplus_margin(value)
+        )
 
     async def async_set_idle_power(self, value: float):
         """Update the idle power."""
-        await self.client.set_idle_power(value)
+        await self._async_write("idle_power", value, self.client.set_idle_power(value))
@@ -0,0 +1,110 @@
+"""Change detection for OpenSurplusManager state writes."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+import time
+from typing import Any
+
+from .const import (
+    CONF_LONG_TERM_STATISTICS,
+    CONF_MAX_SILENCE,
+    CONF_NUMBER_DEADBAND_ABSOLUTE,
+    CONF_NUMBER_DEADBAND_RELATIVE,
+    CONF_SENSOR_DEADBAND_ABSOLUTE,
+    CONF_SENSOR_DEADBAND_RELATIVE,
+    DEFAULT_LONG_TERM_STATISTICS,
+    DEFAULT_MAX_SILENCE,
+    DEFAULT_NUMBER_DEADBAND_ABSOLUTE,
+    DEFAULT_NUMBER_DEADBAND_RELATIVE,
+    DEFAULT_SENSOR_DEADBAND_ABSOLUTE,
+    DEFAULT_SENSOR_DEADBAND_RELATIVE,
+    STATISTICS_RAW_WRITE_INTERVAL,
+)
+
+
+class Deadband:
+    """Decide whether a new value differs enough from the last written one.
+
+    A value is written when availability changes, when it moves further than
+    both the absolute band and the relative band (a percentage of the last
+    written value), or when nothing was written for max_silence seconds.
+    Values are never written more often than once per min_interval seconds.
+    """
+
+    def __init__(
+        self,
+        absolute: float,
+        relative: float,
+        max_silence: float,
+        min_interval: float = 0,
+    ) -> None:
+        """Initialize the deadband."""
+        self.absolute = absolute
+        self.relative = relative / 100
+        self.max_silence = max_silence
+        self.min_interval = min_interval
+        self._last_value: float | None = None
+        self._last_available: bool | None = None
+        self._last_write = 0.0
+
+    @classmethod
+    def for_sensor(cls, options: Mapping[str, Any]) -> Deadband:
+        """Create the deadband used by power sensors.
+
+        Long-term statistics are aggregated from every reading, so the raw
+        states are only needed at a much lower rate when they are imported.
+        """
+        return cls(
+            options.get(
+                CONF_SENSOR_DEADBAND_ABSOLUTE, DEFAULT_SENSOR_DEADBAND_ABSOLUTE
+            ),
+            options.get(
+                CONF_SENSOR_DEADBAND_RELATIVE, DEFAULT_SENSOR_DEADBAND_RELATIVE
+            ),
+            options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+            STATISTICS_RAW_WRITE_INTERVAL
+            if options.get(CONF_LONG_TERM_STATISTICS, DEFAULT_LONG_TERM_STATISTICS)
+            else 0,
+        )
+
+    @classmethod
+    def for_number(cls, options: Mapping[str, Any]) -> Deadband:
+        """Create the deadband used by number entities."""
+        return cls(
+            options.get(
+                CONF_NUMBER_DEADBAND_ABSOLUTE, DEFAULT_NUMBER_DEADBAND_ABSOLUTE
+            ),
+            options.get(
+                CONF_NUMBER_DEADBAND_RELATIVE, DEFAULT_NUMBER_DEADBAND_RELATIVE
+            ),
+            options.get(CONF_MAX_SILENCE, DEFAULT_MAX_SILENCE),
+        )
+
+    def should_write(self, value: float | None, available: bool) -> bool:
+        """Return True and remember the value if it is worth writing."""
+        now = time.monotonic()
+        last = self._last_value
+        if (
+            available == self._last_available
+            and value is not None
+            and last is not None
+            and (
+                now - self._last_write < self.min_interval
+                or (
+                    now - self._last_write < self.max_silence
+                    and abs(value - last)
+                    <= max(self.absolute, self.relative * abs(last))
+                )
+            )
+        ):
+            return False
+
+        self.record(value, available)
+        return True
+
+    def record(self, value: float | None, available: bool) -> None:
+        """Remember a value that is being written regardless of the deadband."""
+        self._last_value = value
+        self._last_available = available
+        self._last_write = time.monotonic()
@@ -1,57 +1,208 @@
 """Representation of a OpenSurplusManager Device."""
 
 import asyncio
+import logging
+import time
+from typing import Any, overload
 
-from pyosmanager import APIError, OSMClient
+from pyosmanager import APIError
 
+from homeassistant.helpers.device_registry import DeviceInfo
 
-class OSMDevice:
-    """Base representation of a OpenSurplusManager Device."""
+from .client import DevicePayload, OSMHTTPClient
+from .const import DOMAIN
+from .optimistic import OptimisticState
+from .state_store import DeviceStateStore
 
-    def __init__(self, client: OSMClient, device_name: str):
-        """Initialize the device."""
+_LOGGER = logging.getLogger(__name__)
+
+
+class _StoredField[T]:
+    """Device attribute backed by a column of the shared state store."""
+
+    __slots__ = ("field",)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.field = name
+
+    @overload
+    def __get__(self, device: None, owner: type) -> "_StoredField[T]": ...
+
+    @overload
+    def __get__(self, device: "OSMDevice", owner: type) -> T | None: ...
+
+    def __get__(self, device, owner=None):
+        if device is None:
+            return self
+        return device.store.get(self.field, device.index)
+
+    def __set__(self, device: "OSMDevice", value: T | None) -> None:
+        device.store.set(self.field, device.index, value)
+
+
+class OSMDevice(OptimisticState):
+    """Base representation of a OpenSurplusManager Device.
+
+    The device itself is only a view: its fields live in a slot of the
+    coordinator's DeviceStateStore, so hundreds of devices share a handful
+    of flat arrays instead of one attribute dict each.
+    """
+
+    __slots__ = (
+        "_waiter",
+        "client",
+        "device_info",
+        "device_name",
+        "index",
+        "store",
+        "unique_id",
+    )
+
+    FIELDS = (
+        "consumption",
+        "powered",
+        "enabled",
+        "max_consumption",
+        "expected_consumption",
+        "cooldown",
+    )
+
+    consumption = _StoredField[float]()
+    powered = _StoredField[bool]()
+    enabled = _StoredField[bool]()
+    max_consumption = _StoredField[float]()
+    expected_consumption = _StoredField[float]()
+    cooldown = _StoredField[int]()
+    last_updated = _StoredField[float]()
+    initialized = _StoredField[bool]()
+
+    def __init__(
+        self,
+        client: OSMHTTPClient,
+        device_name: str,
+        store: DeviceStateStore,
+        scope: str,
+    ):
+        """Initialize the device of the server identified by scope in store."""
+        super().__init__()
         self.client = client
         self.device_name = device_name
-        self.consumption: float | None = None
-        self.powered: bool | None = None
-        self.enabled: bool | None = None
-        self.max_consumption: float | None = None
-        self.expected_consumption: float | None = None
-        self.cooldown: int | None = None
-        self._initialized = False
-
-    async def wait_for_initialization(self):
-        """Wait until the core is initialized."""
-        while not self._initialized:
-            await asyncio.sleep(1)
-
-    async def async_update(self):
-        """Update the device."""
+        self.unique_id = f"{scope}_{device_name}"
+        self.device_info = DeviceInfo(
+            identifiers={(DOMAIN, self.unique_id)}, name=device_name
+        )
+        self.store = store
+        self.index = store.allocate()
+        self._waiter: asyncio.Event | None = None
+
+    async def wait_for_initialization(self, timeout: float) -> bool:
+        """Wait until the device is initialized, giving up after timeout seconds."""
+        if self.initialized:
+            return True
+        # Only created while someone waits, most devices never need one.
+        if self._waiter is None:
+            self._waiter = asyncio.Event()
         try:
-            device = await self.client.get_device(self.device_name)
-            self.consumption = device.consumption
-            self.powered = device.powered
-            self.enabled = device.enabled
-            self.max_consumption = device.max_consumption
-            self.expected_consumption = device.expected_consumption
-            self.cooldown = device.cooldown
-            self._initialized = True
-        except APIError:
-            self.consumption = None
-            self.powered = None
-            self.enabled = None
-            self.max_consumption = None
-            self.expected_consumption = None
-            self.cooldown = None
+            async with asyncio.timeout(timeout):
+                await self._waiter.wait()
+        except TimeoutError:
+            return False
+        return True
+
+    @property
+    def data_age(self) -> float | None:
+        """Return how many seconds ago the state was last refreshed."""
+        if self.last_updated is None:
+            return None
+        return time.monotonic() - self.last_updated
+
+    def update_from_payload(self, payload: DevicePayload):
+        """Update the device from an already fetched device state.
+
+        The fields are written straight from the decoded payload into the
+        state store, with no response object in between.
+        """
+        self.store.update(self.index, payload, self.FIELDS)
+        self.last_updated = time.monotonic()
+        self._reconcile_optimistic()
+        self.initialized = True
+        if self._waiter is not None:
+            self._waiter.set()
+            self._waiter = None
+
+    def apply_delta(self, delta: dict[str, Any]):
+        """Apply a partial device state pushed by the server."""
+        for field in self.FIELDS:
+            if field in delta:
+                setattr(self, field, delta[field])
+        self.last_updated = time.monotonic()
+        self._reconcile_optimistic()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the current state as a plain dict."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def restore(self, state: dict[str, Any], last_updated: float):
+        """Restore a cached state that was fetched at last_updated."""
+        self.apply_delta(state)
+        self.last_updated = last_updated
+
+    def mark_fresh(self) -> None:
+        """Note that the server confirmed the state is unchanged."""
+        self.last_updated = time.monotonic()
+
+    async def async_update(self) -> bool:
+        """Update the device, keeping the last known state if the fetch fails.
+
+        Return whether a new state was applied.
+        """
+        try:
+            device = await self.client.get_device_if_modified(self.device_name)
+        except APIError as err:
+            _LOGGER.debug("Failed to fetch the state of %s: %s", self.device_name, err)
+            return False
+
+        if device is None:
+            self.mark_fresh()
+            return False
+        self.update_from_payload(device)
+        return True
+
+    def expire(self, ttl: float) -> bool:
+        """Forget the cached state once it is older than ttl seconds.
+
+        Return whether a known state was forgotten.
+        """
+        if (age := self.data_age) is not None and age <= ttl:
+            return False
+
+        known = any(getattr(self, field) is not None for field in self.FIELDS)
+        self.consumption = None
+        self.powered = None
+        self.enabled = None
+        self.max_consumption = None
+        self.expected_consumption = None
+        self.cooldown = None
+        return known
 
     async def async_set_max_consumption(self, value: float):
         """Update the max consumption."""
-        await self.client.set_device_max_consumption(self.device_name, value)
+        await self._async_write(
+            "max_consumption",
+            value,
+            self.client.set_device_max_consumption(self.device_name, value),
+        )
 
     async def async_set_expected_consumption(self, value: float):
         """Update the expected consumption."""
-        await self.client.set_device_expected_consumption(self.device_name, value)
+        await self._async_write(
+            "expected_consumption",
+            value,
+            self.client.set_device_expected_consumption(self.device_name, value),
+        )
 
     async def async_set_cooldown(self, value: int):
         """Update the cooldown."""
-        await self.client.set_device_cooldown(self.device_name, value)
+        await self._async_write(
+            "cooldown", value, self.client.set_device_cooldown(self.device_name, value)
+        )
@@ -0,0 +1,59 @@
+"""Diagnostics support for Open Surplus Manager."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from .coordinator import OSMConfigEntry
+
+TO_REDACT = {CONF_HOST}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: OSMConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = entry.runtime_data
+    client = coordinator.client
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.refresh_interval,
+            "last_refresh_duration": coordinator.last_refresh_duration,
+            "cold_start_duration": coordinator.cold_start_duration,
+            "data_age": coordinator.data_age,
+            "push_connected": coordinator.push is not None
+            and coordinator.push.connected,
+            "devices": len(coordinator.devices),
+            "revision": coordinator.data,
+            "statistics_imported": None
+            if coordinator.statistics is None
+            else coordinator.statistics.imported,
+        },
+        "connection_stats": {
+            "created": client.connection_stats.created,
+            "reused": client.connection_stats.reused,
+        },
+        "request_stats": client.request_stats.as_dict(),
+        "conditional_stats": client.conditional_stats.as_dict(),
+        "core": {
+            "data_age": coordinator.core.data_age,
+            "state": coordinator.core.as_dict(),
+        },
+        "devices": {
+            device.device_name: {
+                "data_age": device.data_age,
+                "state": device.as_dict(),
+            }
+            for device in coordinator.devices
+        },
+    }
@@ -0,0 +1,66 @@
+"""Incremental energy integration for OpenSurplusManager power readings."""
+
+from __future__ import annotations
+
+from .const import ENERGY_MAX_GAP
+
+_JOULES_PER_KWH = 3_600_000
+
+
+def _positive_area(start: float, end: float, duration: float) -> float:
+    """Return the area above zero of the line from start to end over duration."""
+    if start >= 0 and end >= 0:
+        return (start + end) / 2 * duration
+    if start <= 0 and end <= 0:
+        return 0.0
+    # The line crosses zero, only the triangle on the positive side counts.
+    peak = max(start, end)
+    return peak * peak / (peak - min(start, end)) / 2 * duration
+
+
+class EnergyAccumulator:
+    """Trapezoidal integral of the positive part of a power reading, in kWh.
+
+    Samples are keyed by the time the reading was fetched, so a refresh that
+    served a cached value adds nothing. Intervals longer than ENERGY_MAX_GAP
+    or next to an unknown reading are skipped instead of being guessed.
+    """
+
+    __slots__ = ("_last_time", "_last_value", "_restored", "total")
+
+    def __init__(self) -> None:
+        """Initialize an empty accumulator."""
+        self.total = 0.0
+        self._last_value: float | None = None
+        self._last_time: float | None = None
+        self._restored = False
+
+    def add(self, value: float | None, timestamp: float | None) -> None:
+        """Add the reading value, in watts, fetched at monotonic timestamp."""
+        if timestamp is None or timestamp == self._last_time:
+            return
+
+        if (
+            value is not None
+            and self._last_value is not None
+            and self._last_time is not None
+            and 0 < timestamp - self._last_time <= ENERGY_MAX_GAP
+        ):
+            self.total += (
+                _positive_area(self._last_value, value, timestamp - self._last_time)
+                / _JOULES_PER_KWH
+            )
+
+        self._last_value = value
+        self._last_time = timestamp
+
+    def restore(self, total: float) -> None:
+        """Continue counting from a total saved before a restart.
+
+        Only the first call counts. The accumulator outlives its entity, which
+        restores again when it is re-added, e.g. after a rename.
+        """
+        if self._restored:
+            return
+        self._restored = True
+        self.total += total
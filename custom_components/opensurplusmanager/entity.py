@@ -0,0 +1,75 @@
+"""Base entities for the Open Surplus Manager integration."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityDescription
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import OSMCoordinator
+from .core import OSMCore
+from .deadband import Deadband
+from .device import OSMDevice
+from .profiler import check_blocking
+
+
+class OSMEntity(CoordinatorEntity[OSMCoordinator]):
+    """Coordinator entity showing the core or device field named by its key."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: OSMCoordinator,
+        target: OSMCore | OSMDevice,
+        description: EntityDescription,
+    ) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._target = target
+        self._attr_device_info = target.device_info
+        self._attr_unique_id = f"{target.unique_id}_{description.key}"
+
+    @property
+    def _value(self) -> Any:
+        """Return the current value of the field."""
+        return getattr(self._target, self.entity_description.key)
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return super().available and self._value is not None
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        """Write the state, warning when it holds the event loop too long."""
+        started = time.perf_counter()
+        super().async_write_ha_state()
+        check_blocking(started, self.coordinator.slow_threshold, "Writing %s", self)
+
+
+class OSMDeadbandEntity(OSMEntity):
+    """Coordinator entity that skips state writes for insignificant changes."""
+
+    _deadband: Deadband
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity is added."""
+        await super().async_added_to_hass()
+        self._deadband.record(self.native_value, self.available)
+
+    @callback
+    def async_write_state_now(self) -> None:
+        """Write the state immediately, bypassing the deadband."""
+        self._deadband.record(self.native_value, self.available)
+        self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the native value changed meaningfully."""
+        if self._deadband.should_write(self.native_value, self.available):
+            self.async_write_ha_state()
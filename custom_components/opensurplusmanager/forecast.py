@@ -0,0 +1,194 @@
+"""Short-horizon surplus forecasting for OpenSurplusManager."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import time
+
+import numpy as np
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import (
+    FORECAST_HALF_LIFE,
+    FORECAST_HISTORY,
+    FORECAST_HORIZONS,
+    FORECAST_MAX_SAMPLES,
+    FORECAST_MIN_SAMPLES,
+    FORECAST_MIN_SPAN,
+    FORECAST_TREND_DAMPING,
+)
+
+
+def fit_trend(
+    times: np.ndarray,
+    values: np.ndarray,
+    now: float,
+    horizons: np.ndarray,
+    *,
+    half_life: float = FORECAST_HALF_LIFE,
+    damping: float = FORECAST_TREND_DAMPING,
+    min_span: float = FORECAST_MIN_SPAN,
+) -> np.ndarray:
+    """Return the values at now + horizons of an exponentially weighted trend.
+
+    A straight line is fitted by weighted least squares, with each sample's
+    weight halving every half_life seconds of age, and extrapolated with the
+    trend damped over damping seconds so long horizons level off instead of
+    running away. The slope is shrunk towards zero while the readings span
+    less than about min_span seconds, where it would mostly fit noise.
+    """
+    offsets = times - now
+    weights = np.exp2(offsets / half_life)
+    total = weights.sum()
+    mean_offset = weights @ offsets / total
+    mean_value = weights @ values / total
+    centered = offsets - mean_offset
+    spread = weights @ (centered * centered) + total * min_span * min_span / 12
+    slope = weights @ (centered * (values - mean_value)) / spread
+    level = mean_value - slope * mean_offset
+    return level + slope * damping * -np.expm1(-horizons / damping)
+
+
+class SampleHistory:
+    """Timestamped readings in a pair of preallocated ring buffers.
+
+    Appending and trimming never allocate, and a snapshot is one or two
+    array copies instead of boxing every float, which keeps the part of a
+    fit that runs on the event loop cheap.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize an empty history holding at most capacity readings."""
+        self._times = np.empty(capacity)
+        self._values = np.empty(capacity)
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of readings."""
+        return self._count
+
+    @property
+    def last_time(self) -> float | None:
+        """Return the timestamp of the newest reading."""
+        if not self._count:
+            return None
+        return float(self._times[(self._start + self._count - 1) % len(self._times)])
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a reading, dropping the oldest one when full."""
+        capacity = len(self._times)
+        index = (self._start + self._count) % capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        if self._count < capacity:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % capacity
+
+    def trim(self, oldest: float) -> None:
+        """Drop the readings taken before oldest."""
+        capacity = len(self._times)
+        while self._count and self._times[self._start] < oldest:
+            self._start = (self._start + 1) % capacity
+            self._count -= 1
+
+    def clear(self) -> None:
+        """Drop every reading."""
+        self._start = self._count = 0
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return copies of the timestamps and values, oldest first."""
+        end = self._start + self._count
+        if end <= len(self._times):
+            return (
+                self._times[self._start : end].copy(),
+                self._values[self._start : end].copy(),
+            )
+        end %= len(self._times)
+        return (
+            np.concatenate((self._times[self._start :], self._times[:end])),
+            np.concatenate((self._values[self._start :], self._values[:end])),
+        )
+
+
+class SurplusForecast:
+    """Bounded surplus history and the latest forecast fitted to it.
+
+    Samples are appended on the event loop. Fitting runs in the executor on
+    a snapshot of the history, at most one fit at a time; a sample arriving
+    during a fit triggers exactly one more once it is done.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize an empty forecast."""
+        self.hass = hass
+        self.entry = entry
+        self.horizons = np.array(FORECAST_HORIZONS, dtype=float)
+        self.values: dict[int, float] | None = None
+        self.history = SampleHistory(FORECAST_MAX_SAMPLES)
+        self._listeners: list[Callable[[], None]] = []
+        self._task: asyncio.Task[None] | None = None
+        self._refit = False
+
+    @callback
+    def async_add_listener(self, listener: Callable[[], None]) -> CALLBACK_TYPE:
+        """Call listener whenever the forecast changes."""
+        self._listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    @callback
+    def async_add(self, value: float | None, timestamp: float | None) -> None:
+        """Add a surplus reading and refit, or clear the forecast without one."""
+        history = self.history
+        if value is None or timestamp is None:
+            if history:
+                history.clear()
+                self.values = None
+                self._notify()
+            return
+        if (last := history.last_time) is not None and timestamp <= last:
+            return
+
+        history.append(timestamp, value)
+        history.trim(timestamp - FORECAST_HISTORY)
+
+        if len(history) < FORECAST_MIN_SAMPLES:
+            return
+        if self._task is not None:
+            self._refit = True
+            return
+        self._task = self.entry.async_create_background_task(
+            self.hass, self._async_fit(), "opensurplusmanager surplus forecast"
+        )
+
+    async def _async_fit(self) -> None:
+        """Fit snapshots of the history until no new sample came in meanwhile."""
+        try:
+            while len(self.history) >= FORECAST_MIN_SAMPLES:
+                self._refit = False
+                forecast = await self.hass.async_add_executor_job(
+                    fit_trend, *self.history.snapshot(), time.monotonic(), self.horizons
+                )
+                if self.history:
+                    self.values = dict(
+                        zip(FORECAST_HORIZONS, forecast.tolist(), strict=True)
+                    )
+                    self._notify()
+                if not self._refit:
+                    return
+        finally:
+            self._task = None
+
+    def _notify(self) -> None:
+        """Tell the listeners the forecast changed."""
+        for listener in self._listeners:
+            listener()
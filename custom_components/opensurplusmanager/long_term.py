@@ -0,0 +1,168 @@
+"""Long-term statistics import for OpenSurplusManager readings."""
+
+from __future__ import annotations
+
+import math
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+)
+from homeassistant.const import UnitOfPower
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN, STATISTICS_BUCKET, STATISTICS_PERIOD
+
+
+class _Bucket:
+    """Mean, minimum and maximum of the samples of one period."""
+
+    __slots__ = ("count", "maximum", "minimum", "start", "total")
+
+    def __init__(self, start: float) -> None:
+        """Initialize an empty bucket starting at the start timestamp."""
+        self.start = start
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    @property
+    def mean(self) -> float:
+        """Return the mean of the samples."""
+        return self.total / self.count
+
+    def add(self, value: float) -> None:
+        """Add a single reading."""
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def add_bucket(self, bucket: _Bucket) -> None:
+        """Fold in a shorter bucket, weighting its mean as a single sample."""
+        self.count += 1
+        self.total += bucket.mean
+        self.minimum = min(self.minimum, bucket.minimum)
+        self.maximum = max(self.maximum, bucket.maximum)
+
+
+class _Series:
+    """Aggregation state of a single statistic."""
+
+    __slots__ = ("bucket", "hour", "last_reading", "metadata", "pending")
+
+    def __init__(self, metadata: StatisticMetaData) -> None:
+        """Initialize the series."""
+        self.metadata = metadata
+        self.last_reading = -math.inf
+        self.bucket: _Bucket | None = None
+        self.hour: _Bucket | None = None
+        self.pending: list[_Bucket] = []
+
+    def close_bucket(self) -> None:
+        """Fold the open bucket into its hour and queue the hour for import."""
+        if (bucket := self.bucket) is None:
+            return
+        self.bucket = None
+        start = bucket.start - bucket.start % STATISTICS_PERIOD
+        if self.hour is None or self.hour.start != start:
+            self.hour = _Bucket(start)
+        self.hour.add_bucket(bucket)
+        if not self.pending or self.pending[-1] is not self.hour:
+            self.pending.append(self.hour)
+
+
+class LongTermStatistics:
+    """Roll the surplus and consumption readings up into external statistics.
+
+    Every reading is added to the bucket of its series covering the current
+    STATISTICS_BUCKET seconds. A closed bucket is folded into its hour as a
+    single sample, so fast polling while the surplus is volatile does not
+    skew the hourly mean, and the hour so far of every series that changed
+    is imported at the next flush. Importing an hour again replaces what was
+    imported for it before, so the statistics trail the readings by at most
+    one bucket while the recorder gets a handful of rows per hour instead of
+    a state per reading.
+    """
+
+    def __init__(self, hass: HomeAssistant, scope: str, title: str) -> None:
+        """Initialize the statistics of the server identified by scope."""
+        self.hass = hass
+        self.imported = 0
+        self._scope = scope
+        self._title = title
+        self._series: dict[tuple[str, str], _Series] = {}
+
+    def _create_series(self, device_name: str, field: str) -> _Series:
+        """Return a new series with the metadata of its statistic."""
+        name = (
+            f"{self._title} Surplus"
+            if field == "surplus"
+            else f"{self._title} {device_name} {field.replace('_', ' ')}"
+        )
+        return _Series(
+            StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=name,
+                source=DOMAIN,
+                statistic_id=(
+                    f"{DOMAIN}:{slugify(f'{self._scope}_{device_name}_{field}')}"
+                ),
+                unit_of_measurement=UnitOfPower.WATT,
+            )
+        )
+
+    def add(
+        self, device_name: str, field: str, value: float | None, timestamp: float
+    ) -> None:
+        """Add a reading taken at the timestamp, ignoring ones already seen."""
+        if value is None:
+            return
+        key = (device_name, field)
+        if (series := self._series.get(key)) is None:
+            series = self._series[key] = self._create_series(device_name, field)
+        if timestamp <= series.last_reading:
+            return
+        series.last_reading = timestamp
+
+        start = timestamp - timestamp % STATISTICS_BUCKET
+        if series.bucket is not None and series.bucket.start != start:
+            series.close_bucket()
+        if series.bucket is None:
+            series.bucket = _Bucket(start)
+        series.bucket.add(value)
+
+    def remove(self, device_name: str, field: str) -> None:
+        """Stop aggregating a series, dropping what was not imported yet."""
+        self._series.pop((device_name, field), None)
+
+    @callback
+    def async_flush(self, *, final: bool = False) -> None:
+        """Import the hours of every series that closed a bucket since.
+
+        With final set the open buckets are closed first, so nothing is lost
+        when the entry unloads.
+        """
+        for series in self._series.values():
+            if final:
+                series.close_bucket()
+            if not series.pending:
+                continue
+            async_add_external_statistics(
+                self.hass,
+                series.metadata,
+                [
+                    StatisticData(
+                        start=dt_util.utc_from_timestamp(hour.start),
+                        mean=hour.mean,
+                        min=hour.minimum,
+                        max=hour.maximum,
+                    )
+                    for hour in series.pending
+                ],
+            )
+            self.imported += len(series.pending)
+            series.pending = []
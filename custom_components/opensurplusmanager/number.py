@@ -1,13 +1,66 @@
 """Support for Open Surplus Manager number entities."""
 
-from homeassistant.components.number import NumberDeviceClass, NumberEntity
-from homeassistant.const import EVENT_HOMEASSISTANT_STARTED, UnitOfPower, UnitOfTime
-from homeassistant.core import CoreState, HomeAssistant
-
-from .const import DOMAIN
-from .coordinator import OSMConfigEntry
+from homeassistant.components.number import (
+    NumberDeviceClass,
+    NumberEntity,
+    NumberEntityDescription,
+)
+from homeassistant.const import UnitOfPower, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+
+from .coordinator import OSMConfigEntry, OSMCoordinator
 from .core import OSMCore
+from .deadband import Deadband
 from .device import OSMDevice
+from .entity import OSMDeadbandEntity
+
+CORE_NUMBERS: tuple[NumberEntityDescription, ...] = (
+    NumberEntityDescription(
+        key="grid_margin",
+        name="Grid Margin",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=NumberDeviceClass.POWER,
+        native_max_value=10000,
+    ),
+    NumberEntityDescription(
+        key="surplus_margin",
+        name="Surplus Margin",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=NumberDeviceClass.POWER,
+        native_max_value=10000,
+    ),
+    NumberEntityDescription(
+        key="idle_power",
+        name="Idle Power",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=NumberDeviceClass.POWER,
+        native_max_value=10000,
+    ),
+)
+
+DEVICE_NUMBERS: tuple[NumberEntityDescription, ...] = (
+    NumberEntityDescription(
+        key="max_consumption",
+        name="Max Consumption",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=NumberDeviceClass.POWER,
+        native_max_value=10000,
+    ),
+    NumberEntityDescription(
+        key="expected_consumption",
+        name="Expected Consumption",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=NumberDeviceClass.POWER,
+        native_max_value=10000,
+    ),
+    NumberEntityDescription(
+        key="cooldown",
+        name="Cooldown",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=NumberDeviceClass.DURATION,
+        native_max_value=10000,
+    ),
+)
 
 
 async def async_setup_entry(
@@ -16,321 +69,49 @@ async def async_setup_entry(
     """Add sensors for passed config_entry in HA."""
     coordinator = entry.runtime_data
 
-    entities = [
-        GridMarginNumber(coordinator.core),
-        SurplusMarginNumber(coordinator.core),
-        IdlePowerNumber(coordinator.core),
-    ]
-
-    for device in coordinator.devices:
-        entities.append(DeviceMaxConsumptionNumber(device))
-        entities.append(DeviceExpectedConsumptionNumber(device))
-        entities.append(DeviceCooldownNumber(device))
-
-    async_add_entities(entities)
-
-
-class GridMarginNumber(NumberEntity):
-    """Representation of a grid margin sensor."""
-
-    _attr_has_entity_name = True
-    _attr_name = None
-    _attr_unit_of_measurement = UnitOfPower.WATT
-    _attr_device_class = NumberDeviceClass.POWER
-    _attr_native_max_value = 10000
-
-    def __init__(self, core: OSMCore) -> None:
-        """Initialize the sensor."""
-        self._core = core
-        self._attr_unique_id = "grid_margin"
-        self._attr_name = "Grid Margin"
-
-    async def async_added_to_hass(self) -> None:
-        """Handle when entity is added."""
-        if self.hass.state is not CoreState.running:
-            self.hass.bus.async_listen_once(
-                EVENT_HOMEASSISTANT_STARTED, self.first_update
-            )
-        else:
-            await self.first_update()
-
-    async def first_update(self, _=None) -> None:
-        """Run first update and write state."""
-        await self._core.wait_for_initialization()
-        self.async_write_ha_state()
-
-    async def async_set_native_value(self, value: float) -> None:
-        """Update the current value."""
-        await self._core.client.set_grid_margin(value)
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._core.grid_margin is not None
-
-    @property
-    def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        return self._core.grid_margin
-
-    @property
-    def device_info(self):
-        """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, "core")},
-        }
-
-
-class SurplusMarginNumber(NumberEntity):
-    """Representation of a surplus margin sensor."""
-
-    _attr_has_entity_name = True
-    _attr_name = None
-    _attr_unit_of_measurement = UnitOfPower.WATT
-    _attr_device_class = NumberDeviceClass.POWER
-    _attr_native_max_value = 10000
-
-    def __init__(self, core: OSMCore) -> None:
-        """Initialize the sensor."""
-        self._core = core
-        self._attr_unique_id = "surplus_margin"
-        self._attr_name = "Surplus Margin"
-
-    async def async_added_to_hass(self) -> None:
-        """Handle when entity is added."""
-        if self.hass.state is not CoreState.running:
-            self.hass.bus.async_listen_once(
-                EVENT_HOMEASSISTANT_STARTED, self.first_update
-            )
-        else:
-            await self.first_update()
-
-    async def first_update(self, _=None) -> None:
-        """Run first update and write state."""
-        await self._core.wait_for_initialization()
-        self.async_write_ha_state()
+    @callback
+    def async_add_devices(devices: list[OSMDevice]) -> None:
+        """Add number entities for devices."""
+        async_add_entities(
+            OSMNumber(coordinator, device, description)
+            for device in devices
+            for description in DEVICE_NUMBERS
+        )
+
+    async_add_entities(
+        OSMNumber(coordinator, coordinator.core, description)
+        for description in CORE_NUMBERS
+    )
+
+    async_add_devices(coordinator.devices)
+    entry.async_on_unload(coordinator.async_add_device_listener(async_add_devices))
+
+
+class OSMNumber(OSMDeadbandEntity, NumberEntity):
+    """Representation of a core or device configuration value."""
+
+    def __init__(
+        self,
+        coordinator: OSMCoordinator,
+        target: OSMCore | OSMDevice,
+        description: NumberEntityDescription,
+    ) -> None:
+        """Initialize the number."""
+        super().__init__(coordinator, target, description)
+        self._deadband = Deadband.for_number(coordinator.config_entry.options)
 
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
-        await self._core.client.set_surplus_margin(value)
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._core.surplus_margin is not None
+        key = self.entity_description.key
+        self._target.set_optimistic(key, value)
+        self.async_write_state_now()
+        self.coordinator.writer.async_schedule(
+            (self._target.device_name, key),
+            value,
+            getattr(self._target, f"async_set_{key}"),
+        )
 
     @property
     def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        return self._core.surplus_margin
-
-    @property
-    def device_info(self):
-        """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, "core")},
-        }
-
-
-class IdlePowerNumber(NumberEntity):
-    """Representation of a idle power sensor."""
-
-    _attr_has_entity_name = True
-    _attr_name = None
-    _attr_unit_of_measurement = UnitOfPower.WATT
-    _attr_device_class = NumberDeviceClass.POWER
-    _attr_native_max_value = 10000
-
-    def __init__(self, core: OSMCore) -> None:
-        """Initialize the sensor."""
-        self._core = core
-        self._attr_unique_id = "idle_power"
-        self._attr_name = "Idle Power"
-
-    async def async_added_to_hass(self) -> None:
-        """Handle when entity is added."""
-        if self.hass.state is not CoreState.running:
-            self.hass.bus.async_listen_once(
-                EVENT_HOMEASSISTANT_STARTED, self.first_update
-            )
-        else:
-            await self.first_update()
-
-    async def first_update(self, _=None) -> None:
-        """Run first update and write state."""
-        await self._core.wait_for_initialization()
-        self.async_write_ha_state()
-
-    async def async_set_native_value(self, value: float) -> None:
-        """Update the current value."""
-        await self._core.client.set_idle_power(value)
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._core.idle_power is not None
-
-    @property
-    def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        return self._core.idle_power
-
-    @property
-    def device_info(self):
-        """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, "core")},
-        }
-
-
-class DeviceMaxConsumptionNumber(NumberEntity):
-    """Representation of a device max consumption sensor."""
-
-    _attr_has_entity_name = True
-    _attr_name = None
-    _attr_unit_of_measurement = UnitOfPower.WATT
-    _attr_device_class = NumberDeviceClass.POWER
-    _attr_native_max_value = 10000
-
-    def __init__(self, device: OSMDevice) -> None:
-        """Initialize the sensor."""
-        self._device = device
-        self._attr_unique_id = f"{device.device_name}_max_consumption"
-        self._attr_name = "Max Consumption"
-
-    async def async_added_to_hass(self) -> None:
-        """Handle when entity is added."""
-        if self.hass.state is not CoreState.running:
-            self.hass.bus.async_listen_once(
-                EVENT_HOMEASSISTANT_STARTED, self.first_update
-            )
-        else:
-            await self.first_update()
-
-    async def first_update(self, _=None) -> None:
-        """Run first update and write state."""
-        await self._device.wait_for_initialization()
-        self.async_write_ha_state()
-
-    async def async_set_native_value(self, value: float) -> None:
-        """Update the current value."""
-        await self._device.async_set_max_consumption(value)
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._device.max_consumption is not None
-
-    @property
-    def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        return self._device.max_consumption
-
-    @property
-    def device_info(self):
-        """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, self._device.device_name)},
-        }
-
-
-class DeviceExpectedConsumptionNumber(NumberEntity):
-    """Representation of a device expected consumption sensor."""
-
-    _attr_has_entity_name = True
-    _attr_name = None
-    _attr_unit_of_measurement = UnitOfPower.WATT
-    _attr_device_class = NumberDeviceClass.POWER
-    _attr_native_max_value = 10000
-
-    def __init__(self, device: OSMDevice) -> None:
-        """Initialize the sensor."""
-        self._device = device
-        self._attr_unique_id = f"{device.device_name}_expected_consumption"
-        self._attr_name = "Expected Consumption"
-
-    async def async_added_to_hass(self) -> None:
-        """Handle when entity is added."""
-        if self.hass.state is not CoreState.running:
-            self.hass.bus.async_listen_once(
-                EVENT_HOMEASSISTANT_STARTED, self.first_update
-            )
-        else:
-            await self.first_update()
-
-    async def first_update(self, _=None) -> None:
-        """Run first update and write state."""
-        await self._device.wait_for_initialization()
-        self.async_write_ha_state()
-
-    async def async_set_native_value(self, value: float) -> None:
-        """Update the current value."""
-        await self._device.async_set_expected_consumption(value)
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._device.expected_consumption is not None
-
-    @property
-    def native_value(self) -> float | None:
-        """Return the state of the sensor."""
-        return self._device.expected_consumption
-
-    @property
-    def device_info(self):
-        """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, self._device.device_name)},
-        }
-
-
-class DeviceCooldownNumber(NumberEntity):
-    """Representation of a device cooldown sensor."""
-
-    _attr_has_entity_name = True
-    _attr_name = None
-    _attr_unit_of_measurement = UnitOfTime.SECONDS
-    _attr_device_class = NumberDeviceClass.DURATION
-    _attr_native_max_value = 10000
-
-    def __init__(self, device: OSMDevice) -> None:
-        """Initialize the sensor."""
-        self._device = device
-        self._attr_unique_id = f"{device.device_name}_cooldown"
-        self._attr_name = "Cooldown"
-
-    async def async_added_to_hass(self) -> None:
-        """Handle when entity is added."""
-        if self.hass.state is not CoreState.running:
-            self.hass.bus.async_listen_once(
-                EVENT_HOMEASSISTANT_STARTED, self.first_update
-            )
-        else:
-            await self.first_update()
-
-    async def first_update(self, _=None) -> None:
-        """Run first update and write state."""
-        await self._device.wait_for_initialization()
-        self.async_write_ha_state()
-
-    async def async_set_native_value(self, value: int) -> None:
-        """Update the current value."""
-        await self._device.async_set_cooldown(value)
-
-    @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._device.cooldown is not None
-
-    @property
-    def native_value(self) -> int | None:
-        """Return the state of the sensor."""
-        return self._device.cooldown
-
-    @property
-    def device_info(self):
-        """Return information to link this entity with the correct device."""
-        return {
-            "identifiers": {(DOMAIN, self._device.device_name)},
-        }
+        """Return the state of the number."""
+        return self._value
@@ -0,0 +1,51 @@
+"""Optimistic write-through state for OpenSurplusManager setters."""
+
+from __future__ import annotations
+
+from collections.abc import Awaitable
+from typing import Any
+
+
+class OptimisticState:
+    """Mixin that shows written values before the server confirms them.
+
+    A value set through set_optimistic is visible immediately and survives
+    fetches that land while its write is still pending. Once the write for
+    the latest value finishes, the value the server returned is kept, or the
+    last fetched value is restored if the write failed.
+    """
+
+    __slots__ = ("_confirmed", "_optimistic")
+
+    def __init__(self) -> None:
+        """Initialize the optimistic state."""
+        self._optimistic: dict[str, Any] = {}
+        self._confirmed: dict[str, Any] = {}
+
+    def set_optimistic(self, field: str, value: Any):
+        """Show value for field until its write is confirmed or rejected."""
+        if field not in self._optimistic:
+            self._confirmed[field] = getattr(self, field)
+        self._optimistic[field] = value
+        setattr(self, field, value)
+
+    def _reconcile_optimistic(self):
+        """Keep pending optimistic values over freshly fetched ones."""
+        for field, value in self._optimistic.items():
+            self._confirmed[field] = getattr(self, field)
+            setattr(self, field, value)
+
+    async def _async_write(self, field: str, value: Any, request: Awaitable[Any]):
+        """Await a setter request and settle the optimistic value it carries."""
+        try:
+            result = await request
+        except Exception:
+            if self._optimistic.get(field) == value:
+                del self._optimistic[field]
+                setattr(self, field, self._confirmed.pop(field))
+            raise
+
+        if self._optimistic.get(field) == value:
+            del self._optimistic[field]
+            del self._confirmed[field]
+            setattr(self, field, result)
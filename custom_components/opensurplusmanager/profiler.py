@@ -0,0 +1,133 @@
+"""Profiling and event loop blocking detection for Open Surplus Manager."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Coroutine, Generator
+import cProfile
+import logging
+import pstats
+import time
+import types
+from typing import Any, TypedDict
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import PROFILE_HOTSPOTS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Hotspot(TypedDict):
+    """A function that took a large share of the profiled time."""
+
+    function: str
+    calls: int
+    own_time: float
+    cumulative_time: float
+
+
+@types.coroutine
+def _timed_steps[R](
+    coro: Coroutine[Any, Any, R], threshold: float, message: str, *args: Any
+) -> Generator[Any, Any, R]:
+    """Run coro, warning about every step that ran longer than threshold.
+
+    A coroutine only holds the event loop between two suspensions, so each
+    send to it is timed on its own rather than the whole await.
+    """
+    send_value: Any = None
+    error: BaseException | None = None
+    while True:
+        started = time.perf_counter()
+        try:
+            suspended = coro.send(send_value) if error is None else coro.throw(error)
+        except StopIteration as stop:
+            _check(time.perf_counter() - started, threshold, message, args)
+            return stop.value
+        finally:
+            error = None
+        _check(time.perf_counter() - started, threshold, message, args)
+        try:
+            send_value = yield suspended
+        except (Exception, asyncio.CancelledError) as err:  # noqa: BLE001
+            # Thrown at the await, errors and cancellations belong to coro
+            # and are raised in it at the next step.
+            error = err
+            send_value = None
+        except BaseException:
+            coro.close()
+            raise
+
+
+def _check(elapsed: float, threshold: float, message: str, args: tuple) -> None:
+    """Log a warning if elapsed is longer than threshold."""
+    if elapsed > threshold:
+        _LOGGER.warning(
+            "%s held the event loop for %.3f seconds", message % args, elapsed
+        )
+
+
+async def watch_blocking[R](
+    coro: Coroutine[Any, Any, R], threshold: float, message: str, *args: Any
+) -> R:
+    """Await coro, warning whenever it holds the loop longer than threshold.
+
+    The message is formatted with args lazily, only when a warning is logged.
+    """
+    return await _timed_steps(coro, threshold, message, *args)
+
+
+def check_blocking(started: float, threshold: float, message: str, *args: Any) -> None:
+    """Warn if the synchronous work begun at perf counter started ran too long."""
+    _check(time.perf_counter() - started, threshold, message, args)
+
+
+async def async_profile(
+    hass: HomeAssistant, action: Callable[[], Awaitable[Any]], path: str
+) -> list[Hotspot]:
+    """Profile everything the event loop runs until action is done.
+
+    The stats are written to path and the functions with the most own time
+    are logged and returned.
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as err:
+        raise HomeAssistantError("Another profiler is already running") from err
+    try:
+        await action()
+    finally:
+        profiler.disable()
+
+    hotspots = await hass.async_add_executor_job(_write_stats, profiler, path)
+    _LOGGER.warning(
+        "Profile written to %s, top hotspots by own time:\n%s",
+        path,
+        "\n".join(
+            f"{spot['own_time']:9.4f} s own {spot['cumulative_time']:9.4f} s"
+            f" cumulative {spot['calls']:>8} calls  {spot['function']}"
+            for spot in hotspots
+        ),
+    )
+    return hotspots
+
+
+def _write_stats(profiler: cProfile.Profile, path: str) -> list[Hotspot]:
+    """Dump the profiler stats to path and return the top hotspots."""
+    profiler.dump_stats(path)
+    stats = pstats.Stats(profiler)
+    ranked = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    return [
+        Hotspot(
+            function=pstats.func_std_string(function),
+            calls=calls,
+            own_time=own_time,
+            cumulative_time=cumulative_time,
+        )
+        for function, (_, calls, own_time, cumulative_time, _) in ranked[
+            :PROFILE_HOTSPOTS
+        ]
+    ]
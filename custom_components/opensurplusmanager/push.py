@@ -0,0 +1,125 @@
+"""Push updates streamed from an OpenSurplusManager server."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from homeassistant.util.json import json_loads_object
+
+from .const import (
+    PUSH_READ_TIMEOUT,
+    PUSH_RECONNECT_MAX_DELAY,
+    PUSH_RECONNECT_MIN_DELAY,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import OSMCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class OSMPushListener:
+    """Server-sent events subscription that applies core and device deltas.
+
+    The server streams ``core`` events carrying a partial core state and
+    ``device`` events carrying the device ``name`` plus the changed fields.
+    While the stream is connected the coordinator only runs a slow safety
+    poll; as soon as it drops, regular polling resumes until it reconnects.
+    """
+
+    def __init__(self, coordinator: OSMCoordinator) -> None:
+        """Initialize the listener."""
+        self.coordinator = coordinator
+        self.connected = False
+
+    async def async_run(self) -> None:
+        """Keep the subscription open, reconnecting with exponential backoff."""
+        delay = PUSH_RECONNECT_MIN_DELAY
+        while True:
+            try:
+                await self._async_listen()
+            except (aiohttp.ClientError, TimeoutError) as err:
+                _LOGGER.debug("Push subscription lost: %s", err)
+            else:
+                _LOGGER.debug("Push subscription closed by the server")
+
+            if self.connected:
+                delay = PUSH_RECONNECT_MIN_DELAY
+                self._set_connected(False)
+                await self.coordinator.async_request_refresh()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PUSH_RECONNECT_MAX_DELAY)
+
+    async def _async_listen(self) -> None:
+        """Open the event stream and dispatch events until it ends."""
+        client = self.coordinator.client
+        async with client.session.get(
+            f"{client.base_url}/api/events",
+            headers={"Accept": "text/event-stream"},
+            timeout=aiohttp.ClientTimeout(total=None, sock_read=PUSH_READ_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            self._set_connected(True)
+            # Catch up on anything that changed while we were disconnected.
+            await self.coordinator.async_request_refresh()
+
+            event = "message"
+            data: list[str] = []
+            async for raw_line in response.content:
+                try:
+                    line = raw_line.decode().rstrip("\r\n")
+                except UnicodeDecodeError:
+                    _LOGGER.debug("Ignoring undecodable push line: %r", raw_line)
+                    continue
+                if not line:
+                    if data:
+                        self._dispatch(event, "\n".join(data))
+                    event = "message"
+                    data = []
+                    continue
+                if line.startswith(":"):
+                    continue
+
+                field, _, value = line.partition(":")
+                value = value.removeprefix(" ")
+                if field == "event":
+                    event = value
+                elif field == "data":
+                    data.append(value)
+
+    def _dispatch(self, event: str, payload: str) -> None:
+        """Apply a single event to the core or a device."""
+        try:
+            delta: dict[str, Any] = json_loads_object(payload)
+        except ValueError:
+            _LOGGER.debug("Ignoring malformed push event: %s", payload)
+            return
+
+        if event == "core":
+            self.coordinator.core.apply_delta(delta)
+        elif event == "device":
+            device = self.coordinator.get_device(delta.get("name"))
+            if device is None:
+                return
+            device.apply_delta(delta)
+        else:
+            return
+
+        self.coordinator.record_readings()
+        # async_set_updated_data would push the safety poll back on every
+        # event, and with it the expiry of devices the stream went quiet on.
+        self.coordinator.data = self.coordinator.next_revision()
+        self.coordinator.async_update_listeners()
+
+    def _set_connected(self, connected: bool) -> None:
+        """Switch the coordinator between safety and regular polling."""
+        self.connected = connected
+        self.coordinator.refresh_update_interval()
+        _LOGGER.debug(
+            "Push subscription %s", "connected" if connected else "disconnected"
+        )
@@ -0,0 +1,227 @@
+"""Rolling-window statistics over OpenSurplusManager power readings."""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+import math
+
+from .const import (
+    ROLLING_QUANTILE_ACCURACY,
+    ROLLING_QUANTILE_BINS,
+    ROLLING_SAMPLE_SPACING,
+)
+
+
+class QuantileSketch:
+    """Fixed-memory quantile estimate that supports removing values.
+
+    Values are counted in logarithmically sized bins, in the manner of
+    DDSketch, so any quantile is returned within the configured relative
+    error. When a sign holds more than max_bins bins, its smallest
+    magnitudes are merged into one; removals follow the same mapping.
+    """
+
+    __slots__ = ("_floors", "_gamma", "_log_gamma", "_max_bins", "_stores", "_zeros")
+
+    def __init__(
+        self,
+        relative_accuracy: float = ROLLING_QUANTILE_ACCURACY,
+        max_bins: int = ROLLING_QUANTILE_BINS,
+    ) -> None:
+        """Initialize an empty sketch."""
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._max_bins = max_bins
+        # Bins for positive and negative values, keyed by magnitude index.
+        self._stores: tuple[dict[int, int], dict[int, int]] = ({}, {})
+        self._floors = [-math.inf, -math.inf]
+        self._zeros = 0
+
+    def _locate(self, value: float) -> tuple[int, int] | None:
+        """Return the sign and bin index of value, or None for zero."""
+        if value == 0:
+            return None
+        index = math.ceil(math.log(abs(value)) / self._log_gamma)
+        sign = 0 if value > 0 else 1
+        return sign, max(index, self._floors[sign])
+
+    def add(self, value: float) -> None:
+        """Count value."""
+        if (location := self._locate(value)) is None:
+            self._zeros += 1
+            return
+
+        sign, index = location
+        store = self._stores[sign]
+        store[index] = store.get(index, 0) + 1
+        if len(store) > self._max_bins:
+            lowest, second = sorted(store)[:2]
+            store[second] += store.pop(lowest)
+            self._floors[sign] = second
+
+    def remove(self, value: float) -> None:
+        """Forget a value that was counted before."""
+        if (location := self._locate(value)) is None:
+            self._zeros -= 1
+            return
+
+        sign, index = location
+        store = self._stores[sign]
+        if store[index] == 1:
+            del store[index]
+        else:
+            store[index] -= 1
+
+    def quantile(self, quantile: float, count: int) -> float | None:
+        """Return the value at quantile among the count values held."""
+        if count == 0:
+            return None
+
+        rank = quantile * (count - 1)
+        seen = 0
+        positive, negative = self._stores
+        for index in sorted(negative, reverse=True):
+            seen += negative[index]
+            if seen > rank:
+                return -self._bin_value(index)
+        seen += self._zeros
+        if seen > rank:
+            return 0.0
+        for index in sorted(positive):
+            seen += positive[index]
+            if seen > rank:
+                return self._bin_value(index)
+        return None
+
+    def _bin_value(self, index: int) -> float:
+        """Return the representative magnitude of a bin."""
+        return 2 * self._gamma**index / (self._gamma + 1)
+
+
+class RollingWindow:
+    """Mean, variance, min, max and quantiles of the samples in a time window.
+
+    Samples live in a ring buffer sized for the window, so memory does not
+    grow with uptime or with the refresh rate. Mean and variance are updated
+    with Welford's method on every insert and eviction, and min and max with
+    monotonic queues, so each sample costs O(1) amortized.
+    """
+
+    __slots__ = (
+        "_m2",
+        "_max_queue",
+        "_mean",
+        "_min_queue",
+        "_sequence",
+        "_start",
+        "_times",
+        "_values",
+        "count",
+        "sketch",
+        "window",
+    )
+
+    def __init__(self, window: float) -> None:
+        """Initialize an empty window of window seconds."""
+        self.window = window
+        capacity = math.ceil(window / ROLLING_SAMPLE_SPACING) + 1
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Samples are numbered in insertion order; the ring slot of sample n
+        # is n % capacity and the oldest held sample is _start.
+        self._start = 0
+        self._sequence = 0
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._min_queue: deque[int] = deque()
+        self._max_queue: deque[int] = deque()
+        self.sketch = QuantileSketch()
+
+    def _value(self, sequence: int) -> float:
+        return self._values[sequence % len(self._values)]
+
+    def add(self, value: float, timestamp: float) -> None:
+        """Add a sample taken at monotonic timestamp.
+
+        Samples taken less than ROLLING_SAMPLE_SPACING seconds after the last
+        one are skipped, so a full ring buffer still spans the whole window.
+        """
+        if (
+            self.count
+            and timestamp - self._times[(self._sequence - 1) % len(self._times)]
+            < ROLLING_SAMPLE_SPACING
+        ):
+            return
+
+        if self.count == len(self._values):
+            self._evict()
+
+        slot = self._sequence % len(self._values)
+        self._times[slot] = timestamp
+        self._values[slot] = value
+        self.count += 1
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        self.sketch.add(value)
+
+        while self._min_queue and self._value(self._min_queue[-1]) >= value:
+            self._min_queue.pop()
+        self._min_queue.append(self._sequence)
+        while self._max_queue and self._value(self._max_queue[-1]) <= value:
+            self._max_queue.pop()
+        self._max_queue.append(self._sequence)
+        self._sequence += 1
+
+    def expire(self, now: float) -> None:
+        """Drop the samples taken more than window seconds before now."""
+        while (
+            self.count
+            and self._times[self._start % len(self._times)] < now - self.window
+        ):
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop the oldest sample."""
+        value = self._value(self._start)
+        self.count -= 1
+        if self.count == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+        else:
+            delta = value - self._mean
+            self._mean -= delta / self.count
+            self._m2 = max(self._m2 - delta * (value - self._mean), 0.0)
+        self.sketch.remove(value)
+
+        if self._min_queue[0] == self._start:
+            self._min_queue.popleft()
+        if self._max_queue[0] == self._start:
+            self._max_queue.popleft()
+        self._start += 1
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean of the samples in the window."""
+        return self._mean if self.count else None
+
+    @property
+    def variance(self) -> float | None:
+        """Return the population variance of the samples in the window."""
+        return self._m2 / self.count if self.count else None
+
+    @property
+    def min(self) -> float | None:
+        """Return the smallest sample in the window."""
+        return self._value(self._min_queue[0]) if self.count else None
+
+    @property
+    def max(self) -> float | None:
+        """Return the largest sample in the window."""
+        return self._value(self._max_queue[0]) if self.count else None
+
+    def quantile(self, quantile: float) -> float | None:
+        """Return the estimated value at quantile of the samples in the window."""
+        return self.sketch.quantile(quantile, self.count)
@@ -0,0 +1,88 @@
+"""Adaptive refresh scheduling for OpenSurplusManager."""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from statistics import pstdev
+
+from .const import (
+    SCHEDULER_ACTIVITY_REFERENCE,
+    SCHEDULER_VOLATILITY_REFERENCE,
+    SCHEDULER_WINDOW,
+)
+
+
+class AdaptiveInterval:
+    """Scale the refresh interval with surplus volatility and device activity.
+
+    Each cycle scores how much the surplus has been moving over the last few
+    samples and how many devices changed their powered flag, and maps the
+    stronger of the two onto the configured interval range. The interval
+    drops immediately when things get busy but only grows back gradually.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float) -> None:
+        """Initialize the scheduler."""
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = self.min_interval
+        self._surplus: deque[float] = deque(maxlen=SCHEDULER_WINDOW)
+        self._powered: dict[str, bool | None] = {}
+
+    def update(self, surplus: float | None, powered: dict[str, bool | None]) -> float:
+        """Record a refresh and return the interval until the next one."""
+        if surplus is not None:
+            self._surplus.append(surplus)
+
+        flips = sum(
+            1
+            for name, state in powered.items()
+            if name in self._powered and self._powered[name] != state
+        )
+        self._powered = powered
+
+        volatility = (
+            pstdev(self._surplus) / SCHEDULER_VOLATILITY_REFERENCE
+            if len(self._surplus) > 1
+            else 0.0
+        )
+        activity = flips / SCHEDULER_ACTIVITY_REFERENCE
+        score = min(1.0, max(volatility, activity))
+
+        target = self.max_interval - score * (self.max_interval - self.min_interval)
+        if target < self.interval:
+            self.interval = target
+        else:
+            self.interval = min(target, self.interval * 1.5)
+        return self.interval
+
+
+class RefreshStagger:
+    """Spread the refresh cycles of every configured server over the interval.
+
+    Each registered server gets an evenly spaced phase, recomputed as servers
+    come and go, and every refresh it schedules is aligned to that phase on a
+    grid shared by all of them. Servers polled at the same interval then take
+    turns instead of waking the event loop and the network at the same moment.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the stagger."""
+        self._members: list[str] = []
+
+    def register(self, member: str) -> Callable[[], None]:
+        """Give member a phase and return a function releasing it."""
+        self._members.append(member)
+
+        def unregister() -> None:
+            self._members.remove(member)
+
+        return unregister
+
+    def next_refresh(self, member: str, now: float, interval: float) -> float:
+        """Return the time of member's refresh closest to one interval from now."""
+        if member not in self._members:
+            return now + interval
+        phase = self._members.index(member) / len(self._members) * interval
+        return round((now + interval - phase) / interval) * interval + phase
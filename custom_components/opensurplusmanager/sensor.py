@@ -2,18 +2,226 @@
 
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
+
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
+    SensorEntityDescription,
     SensorStateClass,
 )
-from homeassistant.const import EVENT_HOMEASSISTANT_STARTED, UnitOfPower
-from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfEnergy, UnitOfPower, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
-from .coordinator import OSMConfigEntry
+from .allocation import AllocationResult
+from .const import (
+    ATTR_DATA_AGE,
+    ATTR_MAX,
+    ATTR_MEDIAN,
+    ATTR_MIN,
+    ATTR_PERCENTILE_10,
+    ATTR_PERCENTILE_90,
+    ATTR_POWERED_DEVICES,
+    ATTR_VARIANCE,
+    ATTR_WORST_CASE_LEFTOVER,
+    FORECAST_HORIZONS,
+    ROLLING_WINDOWS,
+)
+from .coordinator import OSMConfigEntry, OSMCoordinator
 from .core import OSMCore
+from .deadband import Deadband
 from .device import OSMDevice
+from .entity import OSMDeadbandEntity, OSMEntity
+from .rolling import RollingWindow
+
+
+@dataclass(frozen=True, kw_only=True)
+class OSMEnergySensorEntityDescription(SensorEntityDescription):
+    """Describes an energy sensor integrating a power field."""
+
+    source: str
+    device_class: SensorDeviceClass | None = SensorDeviceClass.ENERGY
+    native_unit_of_measurement: str | None = UnitOfEnergy.KILO_WATT_HOUR
+    state_class: SensorStateClass | None = SensorStateClass.TOTAL_INCREASING
+    suggested_display_precision: int | None = 3
+
+
+@dataclass(frozen=True, kw_only=True)
+class OSMStatisticsSensorEntityDescription(SensorEntityDescription):
+    """Describes a rolling statistics sensor over a power field."""
+
+    source: str
+    window: int
+    device_class: SensorDeviceClass | None = SensorDeviceClass.POWER
+    native_unit_of_measurement: str | None = UnitOfPower.WATT
+    state_class: SensorStateClass | None = SensorStateClass.MEASUREMENT
+    suggested_display_precision: int | None = 1
+    entity_registry_enabled_default: bool = False
+
+
+@dataclass(frozen=True, kw_only=True)
+class OSMForecastSensorEntityDescription(SensorEntityDescription):
+    """Describes a surplus forecast sensor for a horizon in seconds."""
+
+    horizon: int
+    device_class: SensorDeviceClass | None = SensorDeviceClass.POWER
+    native_unit_of_measurement: str | None = UnitOfPower.WATT
+    state_class: SensorStateClass | None = SensorStateClass.MEASUREMENT
+    suggested_display_precision: int | None = 0
+
+
+@dataclass(frozen=True, kw_only=True)
+class OSMDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a sensor reporting on the coordinator or the client."""
+
+    value_fn: Callable[[OSMCoordinator], float | None]
+    entity_category: EntityCategory | None = EntityCategory.DIAGNOSTIC
+
+
+def _statistics_descriptions(
+    source: str, name: str
+) -> tuple[OSMStatisticsSensorEntityDescription, ...]:
+    """Return one statistics sensor description per rolling window."""
+    return tuple(
+        OSMStatisticsSensorEntityDescription(
+            key=f"{source}_mean_{window // 60}m",
+            name=f"{name} {window // 60} min Average",
+            source=source,
+            window=window,
+        )
+        for window in ROLLING_WINDOWS
+    )
+
+
+CORE_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="surplus",
+        name="Surplus",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+DEVICE_SENSORS: tuple[SensorEntityDescription, ...] = (
+    SensorEntityDescription(
+        key="consumption",
+        name="Consumption",
+        native_unit_of_measurement=UnitOfPower.WATT,
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+    ),
+)
+
+CORE_STATISTICS_SENSORS = _statistics_descriptions("surplus", "Surplus")
+
+DEVICE_STATISTICS_SENSORS = _statistics_descriptions("consumption", "Consumption")
+
+FORECAST_SENSORS = tuple(
+    OSMForecastSensorEntityDescription(
+        key=f"surplus_forecast_{horizon // 60}m",
+        name=f"Surplus Forecast {horizon // 60} min",
+        horizon=horizon,
+    )
+    for horizon in FORECAST_HORIZONS
+)
+
+ALLOCATION_SENSOR = SensorEntityDescription(
+    key="simulated_leftover",
+    name="Simulated Leftover Surplus",
+    native_unit_of_measurement=UnitOfPower.WATT,
+    device_class=SensorDeviceClass.POWER,
+    state_class=SensorStateClass.MEASUREMENT,
+    suggested_display_precision=0,
+    entity_registry_enabled_default=False,
+)
+
+DIAGNOSTIC_SENSORS: tuple[OSMDiagnosticSensorEntityDescription, ...] = (
+    OSMDiagnosticSensorEntityDescription(
+        key="update_interval",
+        name="Update Interval",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda coordinator: coordinator.refresh_interval,
+    ),
+    OSMDiagnosticSensorEntityDescription(
+        key="refresh_duration",
+        name="Refresh Duration",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.last_refresh_duration,
+    ),
+    OSMDiagnosticSensorEntityDescription(
+        key="data_age",
+        name="Data Age",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.data_age,
+    ),
+    OSMDiagnosticSensorEntityDescription(
+        key="request_latency",
+        name="Request Latency",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.client.request_stats.mean_latency,
+    ),
+    OSMDiagnosticSensorEntityDescription(
+        key="request_errors",
+        name="Request Errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.client.request_stats.errors,
+    ),
+    OSMDiagnosticSensorEntityDescription(
+        key="not_modified_responses",
+        name="Not Modified Responses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.client.conditional_stats.hits,
+    ),
+    OSMDiagnosticSensorEntityDescription(
+        key="connections_opened",
+        name="Connections Opened",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.client.connection_stats.created,
+    ),
+    OSMDiagnosticSensorEntityDescription(
+        key="cold_start_duration",
+        name="Cold Start Duration",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        suggested_display_precision=3,
+        entity_registry_enabled_default=False,
+        value_fn=lambda coordinator: coordinator.cold_start_duration,
+    ),
+)
+
+CORE_ENERGY_SENSORS: tuple[OSMEnergySensorEntityDescription, ...] = (
+    OSMEnergySensorEntityDescription(
+        key="surplus_energy", name="Surplus Energy", source="surplus"
+    ),
+)
+
+DEVICE_ENERGY_SENSORS: tuple[OSMEnergySensorEntityDescription, ...] = (
+    OSMEnergySensorEntityDescription(
+        key="consumption_energy", name="Energy", source="consumption"
+    ),
+)
 
 
 async def async_setup_entry(
@@ -22,112 +230,303 @@ async def async_setup_entry(
     """Add sensors for passed config_entry in HA."""
     coordinator = entry.runtime_data
 
-    entities = [ConsumptionSensor(device) for device in coordinator.devices]
+    @callback
+    def async_add_devices(devices: list[OSMDevice]) -> None:
+        """Add sensors for devices."""
+        entities: list[SensorEntity] = []
+        for device in devices:
+            entities.extend(
+                OSMSensor(coordinator, device, description)
+                for description in DEVICE_SENSORS
+            )
+            entities.extend(
+                OSMEnergySensor(coordinator, device, description)
+                for description in DEVICE_ENERGY_SENSORS
+            )
+            entities.extend(
+                OSMStatisticsSensor(coordinator, device, description)
+                for description in DEVICE_STATISTICS_SENSORS
+            )
+        async_add_entities(entities)
+
+    async_add_devices(coordinator.devices)
+    entry.async_on_unload(coordinator.async_add_device_listener(async_add_devices))
 
-    entities.append(SurplusSensor(coordinator.core))
+    async_add_entities(
+        [
+            *(
+                OSMSensor(coordinator, coordinator.core, description)
+                for description in CORE_SENSORS
+            ),
+            *(
+                OSMEnergySensor(coordinator, coordinator.core, description)
+                for description in CORE_ENERGY_SENSORS
+            ),
+            *(
+                OSMStatisticsSensor(coordinator, coordinator.core, description)
+                for description in CORE_STATISTICS_SENSORS
+            ),
+            *(
+                OSMForecastSensor(coordinator, coordinator.core, description)
+                for description in FORECAST_SENSORS
+            ),
+            OSMAllocationSensor(coordinator, coordinator.core, ALLOCATION_SENSOR),
+            *(
+                OSMDiagnosticSensor(coordinator, description)
+                for description in DIAGNOSTIC_SENSORS
+            ),
+        ]
+    )
 
-    async_add_entities(entities)
 
+def _round_age(age: float | None) -> float | None:
+    """Round a data age to whole seconds."""
+    return None if age is None else round(age)
 
-class ConsumptionSensor(SensorEntity):
-    """Representation of a consumption sensor."""
 
-    _attr_has_entity_name = True
-    _attr_name = None
-    _attr_native_unit_of_measurement = UnitOfPower.WATT
-    _attr_device_class = SensorDeviceClass.POWER
-    _attr_state_class = SensorStateClass.MEASUREMENT
+class OSMSensor(OSMDeadbandEntity, SensorEntity):
+    """Representation of a core or device power sensor."""
+
+    _unrecorded_attributes = frozenset({ATTR_DATA_AGE})
+
+    def __init__(
+        self,
+        coordinator: OSMCoordinator,
+        target: OSMCore | OSMDevice,
+        description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, target, description)
+        self._deadband = Deadband.for_sensor(coordinator.config_entry.options)
+        self._stale = False
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        return self._value
 
-    def __init__(self, device: OSMDevice) -> None:
+    @property
+    def extra_state_attributes(self) -> dict[str, float | None]:
+        """Return how old the served data is."""
+        return {ATTR_DATA_AGE: _round_age(self._target.data_age)}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Also write when the target goes stale or fresh, to show its data age."""
+        if (stale := self.coordinator.is_stale(self._target)) != self._stale:
+            self._stale = stale
+            self.async_write_state_now()
+            return
+        super()._handle_coordinator_update()
+
+
+class OSMEnergySensor(OSMEntity, RestoreSensor):
+    """Representation of the energy integrated from a power reading.
+
+    Only positive power is counted, so the surplus energy is the energy that
+    was available to consume and the total never decreases.
+    """
+
+    entity_description: OSMEnergySensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: OSMCoordinator,
+        target: OSMCore | OSMDevice,
+        description: OSMEnergySensorEntityDescription,
+    ) -> None:
         """Initialize the sensor."""
-        self._device = device
-        self._attr_unique_id = f"{device.device_name}_consumption"
-        self._attr_name = "Consumption"
+        super().__init__(coordinator, target, description)
+        self._accumulator = coordinator.energy_accumulator(target, description.source)
 
     async def async_added_to_hass(self) -> None:
-        """Handle when entity is added."""
-        if self.hass.state is not CoreState.running:
-            self.hass.bus.async_listen_once(
-                EVENT_HOMEASSISTANT_STARTED, self.first_update
-            )
-        else:
-            await self.first_update()
+        """Continue from the total reached before the last restart."""
+        if (
+            last := await self.async_get_last_sensor_data()
+        ) is not None and last.native_value is not None:
+            self._accumulator.restore(float(last.native_value))
+        await super().async_added_to_hass()
+
+    @property
+    def _value(self) -> float:
+        """Return the integrated energy."""
+        return self._accumulator.total
 
-    async def first_update(self, _=None) -> None:
-        """Run first update and write state."""
-        await self.async_update()
-        self.async_write_ha_state()
+    @property
+    def native_value(self) -> float:
+        """Return the state of the sensor."""
+        return self._value
 
-    async def async_update(self) -> None:
-        """Update the sensor."""
-        await self._device.async_update()
+
+class OSMStatisticsSensor(OSMEntity, SensorEntity):
+    """Representation of the rolling average of a power reading.
+
+    The window is only kept while the sensor is enabled. Its minimum,
+    maximum, variance and percentiles are exposed as attributes.
+    """
+
+    entity_description: OSMStatisticsSensorEntityDescription
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_MIN,
+            ATTR_MAX,
+            ATTR_VARIANCE,
+            ATTR_PERCENTILE_10,
+            ATTR_MEDIAN,
+            ATTR_PERCENTILE_90,
+        }
+    )
+
+    def __init__(
+        self,
+        coordinator: OSMCoordinator,
+        target: OSMCore | OSMDevice,
+        description: OSMStatisticsSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, target, description)
+        self._window: RollingWindow | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Start collecting samples."""
+        self._window = self.coordinator.async_track_window(
+            self._target,
+            self.entity_description.source,
+            self.entity_description.window,
+        )
+        await super().async_added_to_hass()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop collecting samples."""
+        await super().async_will_remove_from_hass()
+        self.coordinator.async_untrack_window(
+            self._target,
+            self.entity_description.source,
+            self.entity_description.window,
+        )
+        self._window = None
+
+    @property
+    def _value(self) -> float | None:
+        """Return the mean over the window."""
+        return None if self._window is None else self._window.mean
 
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        return self._device.consumption
+        return self._value
 
     @property
-    def device_info(self):
-        """Return information to link this entity with the correct device."""
+    def extra_state_attributes(self) -> dict[str, float | None]:
+        """Return the spread of the samples in the window."""
+        if (window := self._window) is None:
+            return {}
         return {
-            "identifiers": {(DOMAIN, self._device.device_name)},
-            "name": self._device.device_name,
+            ATTR_MIN: window.min,
+            ATTR_MAX: window.max,
+            ATTR_VARIANCE: window.variance,
+            ATTR_PERCENTILE_10: window.quantile(0.1),
+            ATTR_MEDIAN: window.quantile(0.5),
+            ATTR_PERCENTILE_90: window.quantile(0.9),
         }
 
+
+class OSMForecastSensor(OSMEntity, SensorEntity):
+    """Representation of the surplus expected a fixed time ahead."""
+
+    entity_description: OSMForecastSensorEntityDescription
+
+    async def async_added_to_hass(self) -> None:
+        """Write the state whenever a new forecast is fitted."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.forecast.async_add_listener(self.async_write_ha_state)
+        )
+
     @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._device.consumption is not None
+    def _value(self) -> float | None:
+        """Return the forecast for the horizon."""
+        if (values := self.coordinator.forecast.values) is None:
+            return None
+        return values[self.entity_description.horizon]
 
+    @property
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        return self._value
 
-class SurplusSensor(SensorEntity):
-    """Representation of a consumption sensor."""
 
-    _attr_has_entity_name = True
-    _attr_name = None
-    _attr_native_unit_of_measurement = UnitOfPower.WATT
-    _attr_device_class = SensorDeviceClass.POWER
-    _attr_state_class = SensorStateClass.MEASUREMENT
+class OSMAllocationSensor(OSMEntity, SensorEntity):
+    """Representation of the surplus left once the predicted devices are on.
+
+    The allocation is simulated once per coordinator update and only while
+    the sensor is enabled. The predicted powered devices and the leftover if
+    they all drew their maximum are exposed as attributes.
+    """
+
+    _unrecorded_attributes = frozenset({ATTR_POWERED_DEVICES, ATTR_WORST_CASE_LEFTOVER})
 
-    def __init__(self, core: OSMCore) -> None:
+    def __init__(
+        self,
+        coordinator: OSMCoordinator,
+        target: OSMCore,
+        description: SensorEntityDescription,
+    ) -> None:
         """Initialize the sensor."""
-        self._core = core
-        self._attr_unique_id = "surplus"
-        self._attr_name = "Surplus"
+        super().__init__(coordinator, target, description)
+        self._result: AllocationResult | None = None
 
     async def async_added_to_hass(self) -> None:
-        """Handle when entity is added."""
-        if self.hass.state is not CoreState.running:
-            self.hass.bus.async_listen_once(
-                EVENT_HOMEASSISTANT_STARTED, self.first_update
-            )
-        else:
-            await self.first_update()
+        """Simulate the allocation of the current state."""
+        self._result = self.coordinator.simulate_allocation()
+        await super().async_added_to_hass()
 
-    async def first_update(self, _=None) -> None:
-        """Run first update and write state."""
-        await self.async_update()
-        self.async_write_ha_state()
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Simulate the allocation of the new state."""
+        self._result = self.coordinator.simulate_allocation()
+        super()._handle_coordinator_update()
 
-    async def async_update(self) -> None:
-        """Update the sensor."""
-        await self._core.async_update()
+    @property
+    def _value(self) -> float | None:
+        """Return the simulated leftover surplus."""
+        return None if self._result is None else self._result["leftover"]
 
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        return self._core.surplus
+        return self._value
 
     @property
-    def device_info(self):
-        """Return information to link this entity with the correct device."""
+    def extra_state_attributes(self) -> dict[str, float | list[str]]:
+        """Return the predicted powered devices and the worst case leftover."""
+        if (result := self._result) is None:
+            return {}
         return {
-            "identifiers": {(DOMAIN, "core")},
-            "name": "Core",
+            ATTR_POWERED_DEVICES: result["powered"],
+            ATTR_WORST_CASE_LEFTOVER: result["worst_case_leftover"],
         }
 
+
+class OSMDiagnosticSensor(CoordinatorEntity[OSMCoordinator], SensorEntity):
+    """Representation of a coordinator or client health figure."""
+
+    _attr_has_entity_name = True
+
+    entity_description: OSMDiagnosticSensorEntityDescription
+
+    def __init__(
+        self,
+        coordinator: OSMCoordinator,
+        description: OSMDiagnosticSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{coordinator.core.unique_id}_{description.key}"
+        self._attr_device_info = coordinator.core.device_info
+
     @property
-    def available(self) -> bool:
-        """Return if entity is available."""
-        return self._core.surplus is not None
+    def native_value(self) -> float | None:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self.coordinator)
@@ -0,0 +1,209 @@
+"""Services for the Open Surplus Manager integration."""
+
+from __future__ import annotations
+
+import asyncio
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_STARTUP_TIMEOUT,
+    DEFAULT_STARTUP_TIMEOUT,
+    DEVICE_PARAMETERS,
+    DOMAIN,
+)
+from .coordinator import OSMConfigEntry
+from .profiler import async_profile
+
+SERVICE_PROFILE = "profile"
+SERVICE_SET_DEVICE_PARAMETERS = "set_device_parameters"
+SERVICE_SIMULATE_ALLOCATION = "simulate_allocation"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_CYCLES = "cycles"
+ATTR_DEVICE = "device"
+ATTR_FIELD = "field"
+ATTR_GRID_MARGIN = "grid_margin"
+ATTR_IDLE_POWER = "idle_power"
+ATTR_PARAMETERS = "parameters"
+ATTR_RELOAD = "reload"
+ATTR_SURPLUS = "surplus"
+ATTR_SURPLUS_MARGIN = "surplus_margin"
+ATTR_VALUE = "value"
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CYCLES, default=5): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+        vol.Optional(ATTR_RELOAD, default=False): cv.boolean,
+    }
+)
+
+SET_DEVICE_PARAMETERS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_PARAMETERS): vol.All(
+            cv.ensure_list,
+            vol.Length(min=1),
+            [
+                vol.Schema(
+                    {
+                        vol.Required(ATTR_DEVICE): cv.string,
+                        vol.Required(ATTR_FIELD): vol.In(DEVICE_PARAMETERS),
+                        vol.Required(ATTR_VALUE): vol.All(
+                            vol.Coerce(float), vol.Range(min=0)
+                        ),
+                    }
+                )
+            ],
+        ),
+    }
+)
+
+SIMULATE_ALLOCATION_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_SURPLUS): vol.Coerce(float),
+        vol.Optional(ATTR_GRID_MARGIN): vol.Coerce(float),
+        vol.Optional(ATTR_SURPLUS_MARGIN): vol.Coerce(float),
+        vol.Optional(ATTR_IDLE_POWER): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+
+def _get_entries(hass: HomeAssistant, call: ServiceCall) -> list[OSMConfigEntry]:
+    """Return the loaded entries the service call targets."""
+    if (entry_id := call.data.get(ATTR_CONFIG_ENTRY_ID)) is None:
+        entries = hass.config_entries.async_loaded_entries(DOMAIN)
+    elif (
+        entry := hass.config_entries.async_get_entry(entry_id)
+    ) is not None and entry.domain == DOMAIN:
+        entries = [entry] if entry.state is ConfigEntryState.LOADED else []
+    else:
+        raise ServiceValidationError(f"Unknown config entry {entry_id}")
+
+    if not entries:
+        raise ServiceValidationError("No loaded Open Surplus Manager entry")
+    return entries
+
+
+def _get_entry(hass: HomeAssistant, call: ServiceCall) -> OSMConfigEntry:
+    """Return the single loaded entry the service call targets."""
+    entries = _get_entries(hass, call)
+    if len(entries) > 1:
+        raise ServiceValidationError(
+            "Several Open Surplus Manager entries are loaded, set config_entry_id"
+        )
+    return entries[0]
+
+
+async def _async_refresh(entries: list[OSMConfigEntry], cycles: int) -> None:
+    """Run cycles refreshes of every entry back to back."""
+    for _ in range(cycles):
+        await asyncio.gather(*(entry.runtime_data.async_refresh() for entry in entries))
+
+
+async def _async_reload(hass: HomeAssistant, entries: list[OSMConfigEntry]) -> None:
+    """Reload every entry and wait for the first refresh after the setup."""
+    for entry in entries:
+        await hass.config_entries.async_reload(entry.entry_id)
+        if (
+            entry.state is ConfigEntryState.LOADED
+            and (task := entry.runtime_data.first_refresh) is not None
+        ):
+            await asyncio.wait(
+                [task],
+                timeout=entry.options.get(
+                    CONF_STARTUP_TIMEOUT, DEFAULT_STARTUP_TIMEOUT
+                ),
+            )
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Open Surplus Manager services."""
+
+    async def async_profile_service(call: ServiceCall) -> ServiceResponse:
+        """Profile refresh cycles or a reload and write the stats file."""
+        entries = _get_entries(hass, call)
+        path = hass.config.path(
+            f"{DOMAIN}_profile_{dt_util.utcnow():%Y%m%d%H%M%S}.prof"
+        )
+        if call.data[ATTR_RELOAD]:
+            hotspots = await async_profile(
+                hass, lambda: _async_reload(hass, entries), path
+            )
+        else:
+            hotspots = await async_profile(
+                hass, lambda: _async_refresh(entries, call.data[ATTR_CYCLES]), path
+            )
+        return {"path": path, "hotspots": hotspots}
+
+    async def async_set_device_parameters_service(
+        call: ServiceCall,
+    ) -> ServiceResponse:
+        """Write many device parameters at once and report each result."""
+        entry = _get_entry(hass, call)
+        parameters = [
+            (item[ATTR_DEVICE], item[ATTR_FIELD], item[ATTR_VALUE])
+            for item in call.data[ATTR_PARAMETERS]
+        ]
+        if len({parameter[:2] for parameter in parameters}) < len(parameters):
+            raise ServiceValidationError(
+                "Each device field can only be set once per call"
+            )
+        results = await entry.runtime_data.async_set_device_parameters(parameters)
+        return {"results": results}
+
+    async def async_simulate_allocation_service(
+        call: ServiceCall,
+    ) -> ServiceResponse:
+        """Predict the powered devices with the current or the given core values."""
+        entry = _get_entry(hass, call)
+        result = entry.runtime_data.simulate_allocation(
+            surplus=call.data.get(ATTR_SURPLUS),
+            grid_margin=call.data.get(ATTR_GRID_MARGIN),
+            surplus_margin=call.data.get(ATTR_SURPLUS_MARGIN),
+            idle_power=call.data.get(ATTR_IDLE_POWER),
+        )
+        if result is None:
+            raise ServiceValidationError(
+                "The core state is not known yet, pass the missing values"
+            )
+        return dict(result)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile_service,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_DEVICE_PARAMETERS,
+        async_set_device_parameters_service,
+        schema=SET_DEVICE_PARAMETERS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SIMULATE_ALLOCATION,
+        async_simulate_allocation_service,
+        schema=SIMULATE_ALLOCATION_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,134 @@
+"""Structure-of-arrays storage for OpenSurplusManager device state."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Mapping
+import math
+from typing import Any
+
+# Unknown values are stored as a sentinel so every column stays a flat,
+# unboxed array: NaN for floats and -1 for booleans and integers, which are
+# never negative on the server.
+_FLOAT = "d"
+_BOOL = "b"
+_INT = "q"
+
+COLUMNS: dict[str, str] = {
+    "consumption": _FLOAT,
+    "powered": _BOOL,
+    "enabled": _BOOL,
+    "max_consumption": _FLOAT,
+    "expected_consumption": _FLOAT,
+    "cooldown": _INT,
+    "last_updated": _FLOAT,
+    "initialized": _BOOL,
+}
+
+
+def _encode(typecode: str, value: Any) -> float | int:
+    """Return the array representation of value."""
+    if value is None:
+        return math.nan if typecode == _FLOAT else -1
+    if typecode == _FLOAT:
+        return float(value)
+    return int(value)
+
+
+def _decode_float(raw: float) -> float | None:
+    """Return the float represented by raw."""
+    # NaN is the only value not equal to itself.
+    return raw if raw == raw else None  # noqa: PLR0124
+
+
+def _decode_bool(raw: int) -> bool | None:
+    """Return the boolean represented by raw."""
+    return None if raw < 0 else raw == 1
+
+
+def _decode_int(raw: int) -> int | None:
+    """Return the integer represented by raw."""
+    return None if raw < 0 else raw
+
+
+_DECODERS = {_FLOAT: _decode_float, _BOOL: _decode_bool, _INT: _decode_int}
+
+
+class DeviceStateStore:
+    """Device fields kept in one typed array per field, indexed by device slot.
+
+    Every device owns a slot for its whole lifetime. Slots of removed devices
+    are cleared and handed out again, so the arrays only grow with the peak
+    number of devices.
+    """
+
+    __slots__ = ("_columns", "_free", "_plans", "_size")
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._columns = {
+            field: (typecode, _DECODERS[typecode], array(typecode))
+            for field, typecode in COLUMNS.items()
+        }
+        self._free: list[int] = []
+        self._plans: dict[tuple[str, ...], list[tuple[str, Any, bool, array]]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of allocated slots."""
+        return self._size - len(self._free)
+
+    def allocate(self) -> int:
+        """Reserve a slot with every field unknown and return its index."""
+        if self._free:
+            return self._free.pop()
+
+        for typecode, _, column in self._columns.values():
+            column.append(_encode(typecode, None))
+        self._size += 1
+        return self._size - 1
+
+    def release(self, index: int) -> None:
+        """Clear a slot and make it available for the next device."""
+        for typecode, _, column in self._columns.values():
+            column[index] = _encode(typecode, None)
+        self._free.append(index)
+
+    def get(self, field: str, index: int) -> Any:
+        """Return the value of field for the device in slot index."""
+        _, decode, column = self._columns[field]
+        return decode(column[index])
+
+    def gather(self, field: str, indices: Iterable[int]) -> list[Any]:
+        """Return the values of field for the devices in the slots indices."""
+        _, decode, column = self._columns[field]
+        return [decode(column[index]) for index in indices]
+
+    def set(self, field: str, index: int, value: Any) -> None:
+        """Set the value of field for the device in slot index."""
+        typecode, _, column = self._columns[field]
+        column[index] = _encode(typecode, value)
+
+    def update(
+        self, index: int, values: Mapping[str, Any], fields: tuple[str, ...]
+    ) -> None:
+        """Set each of fields for the device in slot index to its entry in values."""
+        if (plan := self._plans.get(fields)) is None:
+            plan = self._plans[fields] = []
+            for field in fields:
+                typecode, _, column = self._columns[field]
+                plan.append((field, _encode(typecode, None), typecode == _INT, column))
+        # Floats and booleans are stored as they are, only the unknown
+        # sentinel and integers need converting.
+        for field, unknown, integer, column in plan:
+            if (value := values[field]) is None:
+                column[index] = unknown
+            else:
+                column[index] = int(value) if integer else value
+
+    def nbytes(self) -> int:
+        """Return the memory used by the column buffers."""
+        return sum(
+            column.buffer_info()[1] * column.itemsize
+            for _, _, column in self._columns.values()
+        )
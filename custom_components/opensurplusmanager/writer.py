@@ -0,0 +1,142 @@
+"""Debounced write pipeline for OpenSurplusManager setters."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+
+import aiohttp
+from pyosmanager import APIError
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import WRITE_DEBOUNCE
+
+_LOGGER = logging.getLogger(__name__)
+
+type WriteKey = tuple[str, str]
+type Setter = Callable[[float], Awaitable[object]]
+
+
+class OSMWriteQueue:
+    """Coalesce configuration writes per (target, parameter) key.
+
+    Each key has a single pending slot. Values scheduled within the debounce
+    window replace each other and only the last one is sent. A key never has
+    more than one request in flight; a value scheduled while a request is
+    running is sent as soon as that request finishes, so writes cannot land
+    out of order. on_complete runs after every finished request so entities
+    can pick up confirmed or rolled back values. Callers that need the
+    outcome use async_write, which skips the debounce and waits for the
+    request.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        on_complete: Callable[[], None],
+        delay: float = WRITE_DEBOUNCE,
+    ) -> None:
+        """Initialize the write queue."""
+        self.hass = hass
+        self.delay = delay
+        self._on_complete = on_complete
+        self._pending: dict[WriteKey, tuple[float, Setter]] = {}
+        self._waiters: dict[WriteKey, list[asyncio.Future[None]]] = {}
+        self._timers: dict[WriteKey, asyncio.TimerHandle] = {}
+        self._in_flight: dict[WriteKey, asyncio.Task[None]] = {}
+
+    @callback
+    def async_schedule(self, key: WriteKey, value: float, setter: Setter) -> None:
+        """Queue a value for key, replacing any value not yet sent."""
+        self._pending[key] = (value, setter)
+        if key in self._in_flight:
+            return
+
+        if (timer := self._timers.pop(key, None)) is not None:
+            timer.cancel()
+        self._timers[key] = self.hass.loop.call_later(self.delay, self._flush, key)
+
+    async def async_write(self, key: WriteKey, value: float, setter: Setter) -> None:
+        """Send a value for key now and wait until it is written.
+
+        A value still pending for key is replaced. If a request for key is
+        running, the value is sent right after it. Raise the error of the
+        request that carried the value, or of a later value replacing it.
+        """
+        waiter = self.hass.loop.create_future()
+        self._waiters.setdefault(key, []).append(waiter)
+        self._pending[key] = (value, setter)
+        if (timer := self._timers.pop(key, None)) is not None:
+            timer.cancel()
+        self._flush(key)
+        await waiter
+
+    @callback
+    def _flush(self, key: WriteKey) -> None:
+        """Send the pending value for key unless a request is already running."""
+        self._timers.pop(key, None)
+        if key in self._in_flight or key not in self._pending:
+            return
+
+        value, setter = self._pending.pop(key)
+        waiters = self._waiters.pop(key, [])
+        task = self.hass.async_create_background_task(
+            self._async_send(key, value, setter, waiters),
+            f"opensurplusmanager write {key}",
+        )
+        # Tasks start eagerly and may already be done here.
+        if not task.done():
+            self._in_flight[key] = task
+
+    async def _async_send(
+        self,
+        key: WriteKey,
+        value: float,
+        setter: Setter,
+        waiters: list[asyncio.Future[None]],
+    ) -> None:
+        """Send a single value and chain the next pending one for the same key."""
+        try:
+            await setter(value)
+        except (APIError, aiohttp.ClientError, TimeoutError) as err:
+            _LOGGER.error(
+                "Failed to set %s of %s to %s: %s", key[1], key[0], value, err
+            )
+            _settle(waiters, err)
+        except Exception as err:
+            _LOGGER.exception(
+                "Unexpected error setting %s of %s to %s", key[1], key[0], value
+            )
+            _settle(waiters, err)
+        else:
+            _settle(waiters, None)
+        finally:
+            # Does nothing to resolved waiters, releases the others.
+            for waiter in waiters:
+                waiter.cancel()
+            self._in_flight.pop(key, None)
+            if key in self._pending and key not in self._timers:
+                self._flush(key)
+            self._on_complete()
+
+    async def async_shutdown(self) -> None:
+        """Send every pending value now and wait for all requests to finish."""
+        for key, timer in list(self._timers.items()):
+            timer.cancel()
+            self._flush(key)
+
+        while self._in_flight:
+            await asyncio.gather(*self._in_flight.values())
+
+
+def _settle(waiters: list[asyncio.Future[None]], error: Exception | None) -> None:
+    """Pass the outcome of a request to the callers still waiting for it."""
+    for waiter in waiters:
+        if waiter.done():
+            continue
+        if error is None:
+            waiter.set_result(None)
+        else:
+            waiter.set_exception(error)
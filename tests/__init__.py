@@ -0,0 +1 @@
+"""Tests for the Open Surplus Manager integration."""
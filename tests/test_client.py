@@ -0,0 +1,32 @@
+"""Tests for the HTTP client."""
+
+from unittest.mock import patch
+
+import aiohttp
+from pyosmanager import APIError
+import pytest
+
+from custom_components.opensurplusmanager.client import OSMHTTPClient
+
+
+@pytest.mark.enable_socket
+async def test_connection_errors_are_retried(socket_enabled: None) -> None:
+    """Test a request that fails to connect is retried before giving up."""
+    attempts = 0
+    connector = aiohttp.TCPConnector(resolver=aiohttp.ThreadedResolver())
+    async with aiohttp.ClientSession(connector=connector) as session:
+        client = OSMHTTPClient("http://127.0.0.1:1", session)
+        get = session.get
+
+        def counted_get(*args, **kwargs):
+            nonlocal attempts
+            attempts += 1
+            return get(*args, **kwargs)
+
+        with (
+            patch.object(session, "get", counted_get),
+            patch("backoff._async.asyncio.sleep"),
+            pytest.raises(APIError),
+        ):
+            await client.get_core_state_if_modified()
+    assert attempts == 3
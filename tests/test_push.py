@@ -0,0 +1,103 @@
+"""Tests for the push listener."""
+
+import asyncio
+import contextlib
+from datetime import timedelta
+from unittest.mock import patch
+
+import aiohttp
+from aiohttp import web
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.fake_server import FakeOSMConfig, FakeOSMServer
+from custom_components.opensurplusmanager.const import CONF_PUSH_UPDATES, DOMAIN
+from homeassistant.core import HomeAssistant
+
+SAFETY_INTERVAL = timedelta(seconds=1)
+
+
+@pytest.mark.enable_socket
+async def test_safety_poll_runs_while_events_flow(
+    hass: HomeAssistant, socket_enabled: None
+) -> None:
+    """Test pushed events do not postpone the safety poll."""
+    server = FakeOSMServer(FakeOSMConfig(devices=3, event_interval=0.05, seed=0))
+    await server.start()
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={"host": server.url}, options={CONF_PUSH_UPDATES: True}
+    )
+    entry.add_to_hass(hass)
+    try:
+        with (
+            # The aiodns resolver leaves a thread behind that the harness rejects.
+            patch("aiohttp.connector.DefaultResolver", aiohttp.ThreadedResolver),
+            patch(
+                "custom_components.opensurplusmanager.coordinator.PUSH_FALLBACK_INTERVAL",
+                SAFETY_INTERVAL,
+            ),
+        ):
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            coordinator = entry.runtime_data
+            async with asyncio.timeout(10):
+                while not coordinator.push.connected:
+                    await asyncio.sleep(0.01)
+            await hass.async_block_till_done()
+            assert coordinator.refresh_interval == SAFETY_INTERVAL.total_seconds()
+            revision = coordinator.data
+            polls = server.requests["/api/core"]
+
+            # Events arrive twenty times per safety interval. If each of them
+            # postponed the poll, it would never run.
+            await asyncio.sleep(3.5)
+            assert coordinator.push.connected
+            assert coordinator.data > revision
+            assert server.requests["/api/core"] >= polls + 2
+    finally:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        await server.stop()
+
+
+@pytest.mark.enable_socket
+async def test_undecodable_line_is_skipped(
+    hass: HomeAssistant, socket_enabled: None
+) -> None:
+    """Test a line that is not UTF-8 does not drop the stream."""
+    server = FakeOSMServer(FakeOSMConfig(devices=1, seed=0))
+    connections = 0
+
+    async def events(request: web.Request) -> web.StreamResponse:
+        nonlocal connections
+        connections += 1
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await response.write(b'event: core\ndata: {"surplus": \xff}\n\n')
+        await response.write(b'event: core\ndata: {"surplus": 4242.0}\n\n')
+        with contextlib.suppress(ConnectionResetError):
+            while True:
+                await asyncio.sleep(0.05)
+                await response.write(b": keepalive\n\n")
+        return response
+
+    server._events = events
+    await server.start()
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={"host": server.url}, options={CONF_PUSH_UPDATES: True}
+    )
+    entry.add_to_hass(hass)
+    try:
+        with patch("aiohttp.connector.DefaultResolver", aiohttp.ThreadedResolver):
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            coordinator = entry.runtime_data
+            async with asyncio.timeout(10):
+                while coordinator.core.surplus != 4242.0:
+                    await asyncio.sleep(0.01)
+            assert coordinator.push.connected
+            assert connections == 1
+    finally:
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        await server.stop()
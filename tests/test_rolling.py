@@ -0,0 +1,16 @@
+"""Tests for the rolling statistics."""
+
+from custom_components.opensurplusmanager.rolling import RollingWindow
+
+
+def test_window_spans_its_length_with_frequent_samples() -> None:
+    """Test samples closer than the sample spacing do not shorten the window."""
+    window = RollingWindow(900)
+    for step in range(4000):
+        timestamp = step * 0.25
+        window.add(timestamp, timestamp)
+        window.expire(timestamp)
+
+    assert window.count == 900
+    assert window.min == 100.0
+    assert window.max == 999.0
@@ -0,0 +1,31 @@
+"""Tests for the write queue."""
+
+import pytest
+
+from custom_components.opensurplusmanager.writer import OSMWriteQueue
+from homeassistant.core import HomeAssistant
+
+
+async def test_async_write_raises_unexpected_errors(hass: HomeAssistant) -> None:
+    """Test an unexpected setter error reaches the caller instead of a cancel."""
+    completed = []
+    queue = OSMWriteQueue(hass, lambda: completed.append(True))
+
+    async def setter(value: float) -> None:
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await queue.async_write(("device", "cooldown"), 30, setter)
+    assert completed == [True]
+
+
+async def test_async_write_waits_for_the_request(hass: HomeAssistant) -> None:
+    """Test async_write returns once the value was sent."""
+    sent = []
+    queue = OSMWriteQueue(hass, lambda: None)
+
+    async def setter(value: float) -> None:
+        sent.append(value)
+
+    await queue.async_write(("device", "cooldown"), 30, setter)
+    assert sent == [30]